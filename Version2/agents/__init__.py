@@ -5,6 +5,18 @@ from .slide_builder import SlideBuilderAgent
 from .plot_generator import PlotGeneratorAgent
 from .report_assembler import ReportAssemblerAgent
 from .ui_handler import UIHandlerAgent
+from .response_cache import ResponseCache
+from .dataset_cache import DatasetCache
+from .chart_cache import ChartCache
+from .pptx_writer import StreamingPptxWriter
+from .office_pool import OfficeConversionPool
+from .pdf_renderer import PdfRenderer
+from .docx_renderer import DocxRenderer
+from .deck_model import Deck
+from .batch_runner import run_batch, load_manifest
+from .tracing import Tracer, tracer
+from .llm_backends import OllamaBackend, OpenAICompatibleBackend, FakeBackend
+from .prompt_builder import PromptBuilder
 
 __all__ = [
     'DataLoaderAgent',
@@ -12,5 +24,21 @@ __all__ = [
     'SlideBuilderAgent',
     'PlotGeneratorAgent',
     'ReportAssemblerAgent',
-    'UIHandlerAgent'
+    'UIHandlerAgent',
+    'ResponseCache',
+    'DatasetCache',
+    'ChartCache',
+    'StreamingPptxWriter',
+    'OfficeConversionPool',
+    'PdfRenderer',
+    'DocxRenderer',
+    'Deck',
+    'run_batch',
+    'load_manifest',
+    'Tracer',
+    'tracer',
+    'OllamaBackend',
+    'OpenAICompatibleBackend',
+    'FakeBackend',
+    'PromptBuilder'
 ]
\ No newline at end of file
@@ -0,0 +1,218 @@
+# agents/batch_runner.py
+import csv
+import glob
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from .data_loader import DataLoaderAgent
+from .content_generator import ContentGeneratorAgent
+from .slide_builder import SlideBuilderAgent
+from .plot_generator import PlotGeneratorAgent
+from .report_assembler import ReportAssemblerAgent
+from .response_cache import ResponseCache
+from .dataset_cache import DatasetCache
+from .chart_cache import ChartCache
+from .office_pool import OfficeConversionPool
+
+JOB_DEFAULTS = {
+    "plot_type": "Scatter",
+    "prompt": "Default analysis of one column vs others",
+    "theme": "light",
+    "font": "Arial",
+    "format": "pptx",
+    "min_slides": 5
+}
+
+# Caches and office workers shared by the jobs one worker process runs; every job still gets fresh agents
+_worker_resources = None
+
+def _resources():
+    global _worker_resources
+    if _worker_resources is None:
+        _worker_resources = {
+            "response_cache": ResponseCache(),
+            "dataset_cache": DatasetCache(),
+            "chart_cache": ChartCache(),
+            "conversion_pool": OfficeConversionPool(size=1)
+        }
+    return _worker_resources
+
+def load_manifest(path):
+    # A .csv with a header row, a .json list or a .jsonl file of job dicts; csv paths are relative to the manifest
+    base_dir = os.path.dirname(os.path.abspath(path))
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.endswith(".csv"):
+            jobs = [dict(row) for row in csv.DictReader(f)]
+        elif path.endswith(".jsonl"):
+            jobs = [json.loads(line) for line in f if line.strip()]
+        else:
+            jobs = json.load(f)
+    for job in jobs:
+        if job.get("csv"):
+            job["csv"] = os.path.join(base_dir, job["csv"])  # A missing csv is reported per job by run_batch
+    return jobs
+
+def _normalize(job):
+    job = {**JOB_DEFAULTS, **{key: value for key, value in job.items() if value not in (None, "")}}
+    if not job.get("csv") or not job.get("column"):
+        raise ValueError(f"Job needs 'csv' and 'column': {job}")
+    formats = job["format"]
+    job["format"] = [fmt.strip() for fmt in formats.split(",")] if isinstance(formats, str) else list(formats)
+    job["min_slides"] = int(job["min_slides"])
+    return job
+
+def _default_name(job, job_id):
+    # The id prefix keeps jobs apart that share a CSV name and column but differ in directory or settings
+    return f"{os.path.splitext(os.path.basename(job['csv']))[0]}_{job['column']}_{job_id[:8]}"
+
+def _job_id(job):
+    # Changes whenever the inputs or the CSV contents change, so resume never reuses a stale deck
+    with open(job["csv"], "rb") as f:
+        digest = DatasetCache.fingerprint(f)
+    settings = json.dumps({key: value for key, value in job.items() if key != "name"}, sort_keys=True)
+    return hashlib.sha256(f"{digest}:{settings}".encode("utf-8")).hexdigest()
+
+def _record_path(out_dir, job):
+    return os.path.join(out_dir, ".batch", f"{job['name']}.json")
+
+def _write_atomic(path, data):
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def _started_path(out_dir, job):
+    return os.path.join(out_dir, ".batch", f"{job['name']}.started")
+
+def _run_job(job, out_dir):
+    # The marker outlives the job only when its process dies, which tells run_batch which job broke the pool
+    started_path = _started_path(out_dir, job)
+    open(started_path, "wb").close()
+    try:
+        return _build_job(job, out_dir)
+    finally:
+        os.remove(started_path)
+
+def _build_job(job, out_dir):
+    started = time.perf_counter()
+    resources = _resources()
+    data_loader = DataLoaderAgent(dataset_cache=resources["dataset_cache"])
+    content_gen = ContentGeneratorAgent(cache=resources["response_cache"])
+    slide_builder = SlideBuilderAgent(stamping=True)
+    # Jobs already run in parallel, so charts render in-process
+    plot_gen = PlotGeneratorAgent(max_workers=1, cache=resources["chart_cache"])
+    report_assembler = ReportAssemblerAgent(conversion_pool=resources["conversion_pool"])
+    # Slides go to disk as they are built; the finished file becomes the .pptx output without being read back
+    stream_path = os.path.join(out_dir, ".batch", f"{job['name']}.pptx.tmp{os.getpid()}")
+    slide_builder.stream_to(stream_path)
+    try:
+        with open(job["csv"], "rb") as csv_file:
+            success, result = report_assembler.assemble_report(
+                csv_file, job["column"], job["plot_type"], job["min_slides"], job["prompt"],
+                job["theme"], job["font"], data_loader, content_gen, slide_builder, plot_gen
+            )
+        if not success:
+            raise RuntimeError(result)
+        success, result = report_assembler.export_all([fmt for fmt in job["format"] if fmt != "pptx"])
+        if not success:
+            raise RuntimeError(result)
+        outputs = []
+        for fmt in dict.fromkeys(job["format"]):
+            path = os.path.join(out_dir, f"{job['name']}.{fmt}")
+            if fmt == "pptx":
+                os.replace(stream_path, path)
+            else:
+                _write_atomic(path, result[fmt])
+            outputs.append(path)
+    finally:
+        if os.path.exists(stream_path):
+            os.remove(stream_path)
+    return {"outputs": outputs, "slides": len(report_assembler.deck.slides), "seconds": time.perf_counter() - started}
+
+def _clean_up(out_dir, job):
+    # Whatever a job's killed process left behind: its started marker and a partly streamed deck
+    leftovers = glob.glob(os.path.join(glob.escape(os.path.join(out_dir, ".batch", job["name"])) + ".pptx.tmp*"))
+    for path in [_started_path(out_dir, job)] + leftovers:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+def _run_pool(pending, out_dir, workers, results):
+    # Runs jobs on one pool and records their results; returns the jobs a broken pool left unfinished, in manifest order
+    for _, job, _ in pending:
+        _clean_up(out_dir, job)  # A previous run's worker may have died in this job
+    unfinished = []
+    # spawn for the same reason as the chart pool; every job runs isolated from the others' failures
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=min(workers, len(pending)), mp_context=context) as executor:
+        futures = {executor.submit(_run_job, job, out_dir): (i, job, job_id) for i, job, job_id in pending}
+        for future in as_completed(futures):
+            i, job, job_id = futures[future]
+            try:
+                record = {"name": job["name"], "id": job_id, "status": "ok", **future.result()}
+                _write_atomic(_record_path(out_dir, job), json.dumps(record, indent=2).encode("utf-8"))
+            except BrokenProcessPool:
+                unfinished.append((i, job, job_id))
+                continue
+            except Exception as e:
+                record = {"name": job["name"], "id": job_id, "status": "failed", "error": f"{type(e).__name__}: {e}"}
+            results[i] = record
+    return sorted(unfinished, key=lambda entry: entry[0])
+
+def run_batch(manifest, out_dir, workers=None, resume=True, summary_name="summary.json"):
+    # manifest is a list of job dicts or a manifest path; returns the summary also written to out_dir
+    started = time.time()
+    jobs = load_manifest(manifest) if isinstance(manifest, str) else list(manifest)
+    os.makedirs(os.path.join(out_dir, ".batch"), exist_ok=True)
+    results = [None] * len(jobs)
+    pending = []
+    names = set()
+    for i, job in enumerate(jobs):
+        try:
+            job = _normalize(job)
+            job_id = _job_id(job)
+            job.setdefault("name", _default_name(job, job_id))
+            if job["name"] in names:
+                # Two jobs with one name would overwrite each other's decks and records
+                raise ValueError(f"Duplicate job name: {job['name']}")
+            names.add(job["name"])
+        except (ValueError, KeyError, OSError) as e:
+            results[i] = {"name": job.get("name", str(i)), "status": "failed", "error": str(e), "seconds": 0.0}
+            continue
+        record_path = _record_path(out_dir, job)
+        if resume and os.path.exists(record_path):
+            with open(record_path, encoding="utf-8") as f:
+                record = json.load(f)
+            if record.get("id") == job_id and all(os.path.exists(path) for path in record["outputs"]):
+                results[i] = {**record, "status": "skipped"}
+                continue
+        pending.append((i, job, job_id))
+
+    workers = workers or os.cpu_count() or 1
+    while pending:
+        # A worker that dies (e.g. killed for memory) breaks the pool and every job still in it. Jobs that had
+        # not started go to a fresh pool; of those that were running, only the one that kills its process fails.
+        unfinished = _run_pool(pending, out_dir, workers, results)
+        running = [entry for entry in unfinished if os.path.exists(_started_path(out_dir, entry[1]))]
+        pending = [entry for entry in unfinished if entry not in running]
+        for entry in running:
+            if len(running) == 1 or _run_pool([entry], out_dir, 1, results):
+                i, job, job_id = entry
+                results[i] = {"name": job["name"], "id": job_id, "status": "failed", "error": "Worker process died (killed or out of memory)"}
+            _clean_up(out_dir, entry[1])
+
+    summary = {
+        "started": started,
+        "wall_seconds": time.time() - started,
+        "succeeded": sum(result["status"] == "ok" for result in results),
+        "skipped": sum(result["status"] == "skipped" for result in results),
+        "failed": sum(result["status"] == "failed" for result in results),
+        "jobs": results
+    }
+    _write_atomic(os.path.join(out_dir, summary_name), json.dumps(summary, indent=2).encode("utf-8"))
+    return summary
@@ -0,0 +1,44 @@
+# agents/chart_cache.py
+import threading
+from collections import OrderedDict
+
+# Rendered chart images kept in memory, evicting the least recently used once max_bytes is exceeded
+class ChartCache:
+    def __init__(self, max_bytes=256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, image, plot_type):
+        if len(image) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self.size -= len(self._entries.pop(key)[0])
+            self._entries[key] = (image, plot_type)
+            self.size += len(image)
+            while self.size > self.max_bytes:
+                _, (old_image, _) = self._entries.popitem(last=False)
+                self.size -= len(old_image)
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries), "bytes": self.size}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
@@ -1,13 +1,127 @@
-import ollama
+import contextvars
 import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from .tracing import span, traced, annotate
+from .llm_backends import backend_from_env
 
 class ContentGeneratorAgent:
-    def generate_content(self, prompt):
+    def __init__(self, model="llama3.2", max_concurrency=4, cache=None, options=None, stream=True, backend=None, rng=None):
+        # backend is an LLMBackend; by default Ollama, or whatever PPT_LLM_BACKEND selects
+        self.backend = backend if backend is not None else backend_from_env(model)
+        self.model = self.backend.model
+        self.max_concurrency = max_concurrency
+        self.cache = cache
+        self.options = options
+        self.stream = stream  # Stream tokens and stop as soon as max_points lines are complete
+        self.rng = rng if rng is not None else random  # A seeded random.Random makes the bullets per slide reproducible
+
+    def generate_content(self, prompt, max_points=6, stop=None):
+        # stop is an optional threading.Event; once set, a running stream is closed at its next chunk
+        full_prompt = f"{prompt} Provide only the concise, complete text or numbered list (no introductory phrases, no formatting). Ensure 5 to 6 complete bullet points ending with full sentences, derived solely from the provided CSV data analysis."
+        with span("ContentGeneratorAgent.generate_content", backend=self.backend.name, model=self.model, prompt_chars=len(full_prompt)) as s:
+            text = self._generate_content(full_prompt, max_points, stop)
+            if s is not None:
+                s.attrs.setdefault("cached", False)
+                s.set(response_chars=len(text))
+            return text
+
+    def _generate_content(self, full_prompt, max_points, stop=None):
+        key = None
+        if self.cache is not None:
+            # An early-stopped answer is shorter than the full one, so the cut-off is part of the key; so is the
+            # backend, or a stub server's answers would be served to later runs against the real model
+            key_options = {"options": self.options, "max_points": max_points if self.stream else None, "backend": self.backend.identity}
+            key = self.cache.make_key(self.model, full_prompt, key_options)
+            cached = self.cache.get(key)
+            if cached is not None:
+                annotate(cached=True)
+                return cached
         try:
-            response = ollama.generate(model="llama3.2", prompt=f"{prompt} Provide only the concise, complete text or numbered list (no introductory phrases, no formatting). Ensure 5 to 6 complete bullet points ending with full sentences, derived solely from the provided CSV data analysis.")
-            return response['response'].strip()
-        except Exception:
+            if self.stream:
+                text = self._generate_streaming(full_prompt, max_points, stop)
+            else:
+                response = self.backend.generate(full_prompt, options=self.options)
+                self._annotate_tokens(response)
+                text = response['response'].strip()
+        except Exception as e:
+            annotate(error=f"{type(e).__name__}: {e}")
+            # Error text is never cached so the next run retries the model
             return "Analysis failed due to error.\nCSV data could not be processed.\nPlease verify file integrity.\nContact support for assistance.\nThis is an error state."
+        if stop is not None and stop.is_set():
+            annotate(stopped=True)
+            return text  # Possibly cut short, so never cached; the caller discards it anyway
+        if key is not None:
+            self.cache.put(key, text)
+        return text
+
+    def _generate_streaming(self, full_prompt, max_points, stop=None):
+        text = ""
+        complete_lines = 0
+        stream = self.backend.generate(full_prompt, options=self.options, stream=True)
+        try:
+            for chunk in stream:
+                if stop is not None and stop.is_set():
+                    break
+                piece = chunk['response']
+                text += piece
+                self._annotate_tokens(chunk)
+                if not max_points or '\n' not in piece:
+                    continue
+                complete_lines = sum(1 for line in text.split('\n')[:-1] if line.strip())
+                if complete_lines >= max_points:
+                    # Everything after this is discarded by split_into_bullets anyway
+                    text = '\n'.join([line for line in text.split('\n')[:-1] if line.strip()][:max_points])
+                    break
+        finally:
+            # Closing the generator drops the HTTP connection, which cancels generation server-side
+            close = getattr(stream, "close", None)
+            if close:
+                close()
+        return text.strip()
+
+    @staticmethod
+    def _annotate_tokens(response):
+        # Ollama reports token counts only on the final (done) chunk, so early-stopped streams have none
+        try:
+            counts = {name: response[name] for name in ("prompt_eval_count", "eval_count") if response.get(name) is not None}
+        except (AttributeError, KeyError, TypeError):
+            return
+        if counts:
+            annotate(**counts)
+
+    @traced()
+    def generate_many(self, prompts, max_points=6, on_result=None):
+        # Prompts are independent, so send them concurrently; answers come back in prompt order.
+        # on_result(done, total) is called from this thread as answers arrive and may raise to stop early.
+        prompts = list(prompts)
+        annotate(prompts=len(prompts))
+        if isinstance(max_points, int) or max_points is None:
+            max_points = [max_points] * len(prompts)
+        if self.max_concurrency <= 1 or len(prompts) <= 1:
+            results = []
+            for prompt, points in zip(prompts, max_points):
+                results.append(self.generate_content(prompt, points))
+                if on_result is not None:
+                    on_result(len(results), len(prompts))
+            return results
+        executor = ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(prompts)))
+        stop = threading.Event()
+        try:
+            # Each prompt runs in a copy of this context so its span nests under the caller's
+            futures = [executor.submit(contextvars.copy_context().run, self.generate_content, prompt, points, stop)
+                       for prompt, points in zip(prompts, max_points)]
+            if on_result is not None:
+                for done, _ in enumerate(as_completed(futures), 1):
+                    on_result(done, len(futures))
+            results = [future.result() for future in futures]
+        except BaseException:
+            # on_result stopped the batch: drop unsent prompts, close running streams and return without waiting
+            stop.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        executor.shutdown()
+        return results
 
     def split_into_bullets(self, text, min_points=5, max_points=6):
         lines = [line.strip() for line in text.split('\n') if line.strip()]
@@ -19,5 +133,5 @@ class ContentGeneratorAgent:
                 "No insights can be derived.",
                 "This is an error message."
             ]
-        num_points = random.randint(min_points, min(max_points, len(lines)))
-        return lines[:num_points]
\ No newline at end of file
+        num_points = self.rng.randint(min_points, min(max_points, len(lines)))
+        return lines[:num_points]
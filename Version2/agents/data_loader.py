@@ -1,49 +1,176 @@
+import os
+import warnings
+import numpy as np
 import pandas as pd
+from .streaming_stats import StreamingStats
+from .stats_table import StatsTable
+from .dataset_cache import DatasetCache
+from .tracing import span, traced, annotate
 
 class DataLoaderAgent:
-    def __init__(self):
+    def __init__(self, chunksize=None, large_file_bytes=512 * 1024 * 1024, sample_rows=200_000, dataset_cache=None):
         self.df = None
+        self.num_rows = 0
         self.num_cols = 0
         self.other_cols = []
         self.data_types = {}
         self.stats = {}
+        self.sampled = False  # True when self.df holds a row sample rather than the whole CSV
+        self.chunksize = chunksize  # Rows per chunk; forces chunked mode when set
+        self.large_file_bytes = large_file_bytes  # Uploads above this size are read in chunks automatically
+        self.sample_rows = sample_rows
+        self.dataset_cache = dataset_cache
+        self.digest = None  # Content hash of the loaded upload plus how it was loaded (full or sampled)
+        self.message = ""
 
+    @traced(memory=True)
     def load_data(self, csv_file):
         csv_file.seek(0)
         try:
+            chunked = self._use_chunks(csv_file)
+            # A chunked load keeps only a row sample, so it must never be served to a loader expecting every row
+            mode = f"sample{self.sample_rows}" if chunked else "full"
+            digest = f"{DatasetCache.fingerprint(csv_file)}-{mode}"
+            if digest == self.digest and self.df is not None:
+                # Same upload already parsed by this agent, e.g. by the UI before assemble_report
+                annotate(cache="agent")
+                return True, self.message
+            self.digest = None
+            if self.dataset_cache is not None:
+                entry = self.dataset_cache.get(digest)
+                if entry is not None:
+                    self._restore(digest, entry)
+                    annotate(cache="dataset", rows=self.num_rows, cols=self.num_cols)
+                    return True, self.message
+            if chunked:
+                success, message = self.load_data_chunked(csv_file)
+            else:
+                success, message = self._load_full(csv_file)
+            annotate(rows=self.num_rows, cols=self.num_cols, sampled=self.sampled)
+            if success:
+                self.digest = digest
+                self.message = message
+                if self.dataset_cache is not None:
+                    self.dataset_cache.put(digest, self._snapshot())
+            return success, message
+        except Exception as e:
+            return False, f"Error reading CSV: {str(e)}"
+
+    def _load_full(self, csv_file):
+        csv_file.seek(0)
+        with span("pd.read_csv", memory=True) as s:
             self.df = pd.read_csv(csv_file)
-            if self.df.empty:
+            if s is not None:
+                s.set(rows=len(self.df), cols=len(self.df.columns))
+        if self.df.empty:
+            return False, "CSV file is empty."
+        self.num_rows = len(self.df)
+        self.num_cols = len(self.df.columns)
+        self.sampled = False
+        self.detect_data_types()
+        self.analyze_data()
+        return True, f"Loaded with {self.num_rows} rows and {self.num_cols} columns."
+
+    def _snapshot(self):
+        return {"df": self.df, "num_rows": self.num_rows, "data_types": self.data_types,
+                "stats": self.stats, "sampled": self.sampled, "message": self.message}
+
+    def _restore(self, digest, entry):
+        self.df = entry["df"]
+        self.num_rows = entry["num_rows"]
+        self.num_cols = len(self.df.columns)
+        self.data_types = entry["data_types"]
+        self.stats = entry["stats"]
+        self.sampled = entry["sampled"]
+        self.message = entry["message"]
+        self.digest = digest
+
+    def _use_chunks(self, csv_file):
+        if self.chunksize:
+            return True
+        size = getattr(csv_file, "size", None)
+        if size is None:
+            size = csv_file.seek(0, os.SEEK_END)
+            csv_file.seek(0)
+        return size > self.large_file_bytes
+
+    @traced(memory=True)
+    def load_data_chunked(self, csv_file):
+        # One streaming pass with mergeable accumulators; only a bounded row sample is kept for plotting
+        csv_file.seek(0)
+        try:
+            streaming = StreamingStats(sample_rows=self.sample_rows)
+            for chunk in pd.read_csv(csv_file, chunksize=self.chunksize or 100_000):
+                streaming.update(chunk)
+            if not streaming.num_rows:
                 return False, "CSV file is empty."
-            self.num_cols = len(self.df.columns)
-            self.detect_data_types()
-            self.analyze_data()
-            return True, f"Loaded with {len(self.df)} rows and {self.num_cols} columns."
+            self.df = streaming.sample
+            self.num_rows = streaming.num_rows
+            self.num_cols = len(streaming.columns)
+            self.sampled = len(self.df) < self.num_rows
+            self.data_types = streaming.data_types()
+            self.stats = streaming.to_stats()
+            message = f"Loaded with {self.num_rows} rows and {self.num_cols} columns."
+            if self.sampled:
+                message += f" Plots use a sample of {len(self.df)} rows."
+            return True, message
         except Exception as e:
             return False, f"Error reading CSV: {str(e)}"
 
     def detect_data_types(self):
         self.data_types = {col: str(self.df[col].dtype) for col in self.df.columns}
 
+    @traced()
     def analyze_data(self):
-        self.stats = {}
-        for col in self.df.columns:
-            stats = {}
-            if pd.api.types.is_numeric_dtype(self.df[col]):
-                stats['mean'] = f"{self.df[col].mean():.2f}"
-                stats['min'] = f"{self.df[col].min():.2f}"
-                stats['max'] = f"{self.df[col].max():.2f}"
-                stats['std'] = f"{self.df[col].std():.2f}"
-            stats['unique'] = str(self.df[col].nunique())
-            stats['top'] = str(self.df[col].mode()[0]) if not self.df[col].mode().empty else "N/A"
-            self.stats[col] = stats
-        # Compute correlations
+        # Numeric reductions run once over a single float matrix instead of column by column
         numeric_cols = [col for col in self.df.columns if pd.api.types.is_numeric_dtype(self.df[col])]
-        if len(numeric_cols) > 1:
-            corr_matrix = self.df[numeric_cols].corr()
-            for col1 in numeric_cols:
-                for col2 in numeric_cols:
-                    if col1 != col2:
-                        self.stats[col1][f"corr_with_{col2}"] = f"{corr_matrix.loc[col1, col2]:.2f}"
+        values = self.df[numeric_cols].to_numpy(dtype=np.float64, na_value=np.nan)
+        with warnings.catch_warnings(), np.errstate(invalid="ignore", divide="ignore"):
+            warnings.simplefilter("ignore", RuntimeWarning)
+            mean = np.nanmean(values, axis=0)
+            minimum = np.nanmin(values, axis=0) if len(values) else np.full(len(numeric_cols), np.nan)
+            maximum = np.nanmax(values, axis=0) if len(values) else np.full(len(numeric_cols), np.nan)
+            std = np.nanstd(values, axis=0, ddof=1)
+            corr = None
+            if len(numeric_cols) > 1:
+                if np.isnan(values).any():
+                    corr = self.df[numeric_cols].corr().to_numpy()  # Pairwise-complete, like before
+                else:
+                    corr = np.corrcoef(values, rowvar=False)
+        unique, top = [], []
+        for col in self.df.columns:
+            column = self.df[col]
+            if col in numeric_cols and isinstance(column.dtype, np.dtype):
+                # Sorted runs give the distinct count and the mode together, much faster than hashing floats
+                count, mode = self._unique_and_mode_sorted(column.to_numpy())
+            else:
+                counts = column.value_counts()
+                count, mode = len(counts), self._mode_from_counts(counts)
+            unique.append(count)
+            top.append(mode)
+        self.stats = StatsTable(self.df.columns, numeric_cols, mean, minimum, maximum, std, unique, top, corr)
+
+    @staticmethod
+    def _unique_and_mode_sorted(values):
+        values = np.sort(values)
+        if values.dtype.kind == "f":
+            values = values[~np.isnan(values)]
+        if not len(values):
+            return 0, None
+        starts = np.flatnonzero(np.r_[True, values[1:] != values[:-1]])
+        run_lengths = np.diff(np.r_[starts, len(values)])
+        # argmax picks the first longest run, i.e. the smallest tied value, as Series.mode() does
+        return len(starts), values[starts[run_lengths.argmax()]]
+
+    @staticmethod
+    def _mode_from_counts(counts):
+        if counts.empty:
+            return None
+        tied = counts.index[counts.to_numpy() == counts.iloc[0]]
+        try:
+            return tied.min()  # Series.mode() returns the smallest of tied values
+        except TypeError:
+            return tied[0]
 
     def set_column(self, col):
         self.other_cols = [c for c in self.df.columns if c != col]
\ No newline at end of file
@@ -0,0 +1,135 @@
+# agents/dataset_cache.py
+import hashlib
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # Disk layer is skipped without pyarrow; the in-memory layer still works
+    pa = None
+    feather = None
+
+# Parsed datasets keyed by a SHA-256 of the uploaded bytes and the load mode. Recently used frames stay in
+# memory; every entry is also written as an Arrow IPC file plus pickled statistics. On read the file is
+# memory-mapped and numeric columns without nulls become zero-copy views of it. The disk layer keeps to
+# max_disk_bytes by evicting the least recently used entries (by mtime, refreshed on every read).
+class DatasetCache:
+    def __init__(self, cache_dir=os.path.join(".cache", "datasets"), max_memory_entries=4, max_disk_bytes=4 * 1024**3):
+        self.cache_dir = cache_dir
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def fingerprint(csv_file, block_size=1024 * 1024):
+        csv_file.seek(0)
+        digest = hashlib.sha256()
+        for block in iter(lambda: csv_file.read(block_size), b""):
+            digest.update(block if isinstance(block, bytes) else block.encode("utf-8"))
+        csv_file.seek(0)
+        return digest.hexdigest()
+
+    def get(self, digest):
+        with self._lock:
+            if digest in self._memory:
+                self._memory.move_to_end(digest)
+                self.hits += 1
+                return self._memory[digest]
+        entry = self._read_disk(digest)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._remember(digest, entry)
+        return entry
+
+    def put(self, digest, entry):
+        with self._lock:
+            self._remember(digest, entry)
+        self._write_disk(digest, entry)
+
+    def _remember(self, digest, entry):
+        self._memory[digest] = entry
+        self._memory.move_to_end(digest)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _entry_dir(self, digest):
+        return os.path.join(self.cache_dir, digest[:2], digest)
+
+    def _read_disk(self, digest):
+        if feather is None:
+            return None
+        path = self._entry_dir(digest)
+        try:
+            table = feather.read_table(os.path.join(path, "data.arrow"), memory_map=True)
+            with open(os.path.join(path, "meta.pkl"), "rb") as f:
+                entry = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError, pa.ArrowException):
+            return None
+        self._touch(path)
+        # split_blocks keeps one block per column, so columns whose Arrow layout matches numpy are not copied
+        entry["df"] = table.to_pandas(split_blocks=True, self_destruct=True)
+        return entry
+
+    def _write_disk(self, digest, entry):
+        if feather is None:
+            return
+        path = self._entry_dir(digest)
+        if os.path.isdir(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(dir=os.path.dirname(path))
+        try:
+            # Uncompressed and in one record batch, so each column maps to a single contiguous buffer on read
+            feather.write_feather(entry["df"], os.path.join(tmp_dir, "data.arrow"), compression="uncompressed",
+                                  chunksize=max(len(entry["df"]), 1))
+            with open(os.path.join(tmp_dir, "meta.pkl"), "wb") as f:
+                pickle.dump({key: value for key, value in entry.items() if key != "df"}, f)
+            os.replace(tmp_dir, path)
+        except (OSError, ValueError, TypeError, pa.ArrowException):
+            # Mixed-type object columns cannot always be stored as Arrow; keep the memory copy only
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            return
+        self._evict(keep=path)
+
+    @staticmethod
+    def _touch(path):
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def _evict(self, keep=None):
+        # Drop least recently used entries until the disk layer fits again; the newest entry always stays
+        entries = []
+        for root, dirs, files in os.walk(self.cache_dir):
+            if "meta.pkl" in files:
+                try:
+                    size = sum(os.path.getsize(os.path.join(root, name)) for name in files)
+                    entries.append((os.path.getmtime(root), size, root))
+                except OSError:
+                    continue  # Removed by another process meanwhile
+                dirs.clear()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_disk_bytes:
+                break
+            if path == keep:
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
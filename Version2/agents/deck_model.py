@@ -0,0 +1,75 @@
+# agents/deck_model.py
+from .slide_builder import SlideBuilderAgent
+
+# A built report as an ordered list of slide specs (the dicts SlideBuilderAgent records) plus the
+# Presentation rendered from them. Editing a slide changes its spec and re-renders only that slide,
+# so no LLM call or chart is repeated. Exports read the current specs and Presentation.
+class Deck:
+    def __init__(self, slide_builder):
+        self.slide_builder = slide_builder
+        self.slides = slide_builder.slide_data
+        self.edited = False  # Set once a streamed deck's specs no longer match the file it was streamed to
+
+    @property
+    def titles(self):
+        return [spec["title"] for spec in self.slides]
+
+    @property
+    def streamed(self):
+        # Streamed slides are no longer in memory, so edits only change specs and exports rebuild
+        return self.slide_builder.writer is not None
+
+    @property
+    def pptx_file(self):
+        # Where the streamed deck is, while it still shows the current specs; None when it must be rebuilt
+        if not self.streamed or self.edited:
+            return None
+        return self.slide_builder.writer.output
+
+    def find(self, title):
+        for i, spec in enumerate(self.slides):
+            if spec["title"] == title:
+                return i
+        return None
+
+    def update_slide(self, index, title=None, content=None):
+        spec = dict(self.slides[index])
+        if title is not None:
+            spec["title"] = title
+        if content is not None:
+            spec["content"] = [point for point in content if point.strip()] or None
+        if spec == self.slides[index]:
+            return False
+        if self.streamed:
+            self.slides[index] = spec
+            self.edited = True
+        else:
+            self.slide_builder.replace_slide(index, spec)
+        return True
+
+    def append_slide(self, title, content):
+        if self.streamed:
+            self.slides.append(self.slide_builder.make_spec(title, content))
+            self.edited = True
+        else:
+            self.slide_builder.add_slide(title, content)
+
+    def apply_edits(self, edited_slides):
+        # {title: bullet lines}; titles not in the deck become new text slides at the end
+        changed = 0
+        for title, content in edited_slides.items():
+            index = self.find(title)
+            if index is None:
+                self.append_slide(title, content)
+                changed += 1
+            elif self.update_slide(index, content=content):
+                changed += 1
+        return changed
+
+    def presentation(self):
+        if not self.streamed:
+            return self.slide_builder.prs
+        builder = SlideBuilderAgent(stamping=True)
+        for spec in self.slides:
+            builder.render_spec(spec)
+        return builder.prs
@@ -0,0 +1,59 @@
+# agents/docx_renderer.py
+import io
+from docx import Document
+from docx.shared import Inches
+from .pptx_writer import open_image
+from .tracing import traced, annotate
+
+# Builds the DOCX export from SlideBuilderAgent.slide_data: one heading per slide, its bullets,
+# tables and chart images embedded inline, written to memory. python-docx stores each distinct
+# image once, so charts repeated across slides do not grow the file.
+class DocxRenderer:
+    def __init__(self, image_width=6):
+        self.image_width = Inches(image_width)
+
+    @traced(memory=True)
+    def render(self, slides):
+        doc = Document()
+        # Resolve style ids once and set them on the XML; python-docx re-scans every style per styled paragraph
+        styles = doc.styles
+        title_id, heading_id, bullet_id = (styles[name].style_id for name in ("Title", "Heading 1", "List Bullet"))
+        for i, slide in enumerate(slides):
+            if i:
+                doc.add_page_break()
+            doc.add_paragraph(slide["title"])._p.style = title_id if slide.get("cover") else heading_id
+            if slide.get("image") is not None:
+                image = slide["image"]
+                doc.add_picture(open_image(image), width=self.image_width)
+            elif slide.get("layout") == "table" and slide.get("table_data"):
+                rows = slide["table_data"]
+                table = doc.add_table(rows=len(rows), cols=len(rows[0]))
+                for row, values in zip(table.rows, rows):
+                    for cell, value in zip(row.cells, values):
+                        cell.text = str(value)
+            elif slide.get("layout") == "progress" and slide.get("progress") is not None:
+                doc.add_paragraph(f"Progress: {slide['progress']*100:.0f}%")
+            elif slide.get("content"):
+                for point in slide["content"]:
+                    doc.add_paragraph(str(point))._p.style = bullet_id
+        buffer = io.BytesIO()
+        doc.save(buffer)
+        annotate(slides=len(slides), output_bytes=buffer.tell())
+        return buffer.getvalue()
+
+    @staticmethod
+    def slides_from_presentation(prs):
+        # For decks that were not built by SlideBuilderAgent: the title, text lines and first picture of each slide
+        slides = []
+        for slide in prs.slides:
+            title_shape = slide.shapes.title
+            content, image = [], None
+            for shape in slide.shapes:
+                if shape == title_shape:
+                    continue
+                if shape.has_text_frame:
+                    content.extend(line.lstrip("• ") for line in shape.text_frame.text.split("\n") if line.strip())
+                elif shape.shape_type == 13 and image is None:  # Picture
+                    image = shape.image.blob
+            slides.append({"title": title_shape.text if title_shape is not None else "", "content": content, "image": image, "layout": "text"})
+        return slides
@@ -0,0 +1,119 @@
+# agents/job_engine.py
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+STAGES = ["load", "llm", "charts", "assembly", "export"]
+
+class JobCancelled(Exception):
+    pass
+
+
+class Job:
+    # One background run. The worker reports progress through update(), which is also where a
+    # requested cancellation takes effect, so work stops at the next stage or item boundary.
+    def __init__(self, key=None):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.status = "queued"  # queued, running, done, failed or cancelled
+        self.stage = None
+        self.stages = {}  # stage -> [done, total]
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.finished = None
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+
+    def update(self, stage, done=0, total=1):
+        with self._lock:
+            self.stage = stage
+            self.stages[stage] = [done, total]
+        if self._cancel.is_set():
+            raise JobCancelled(f"Cancelled during {stage}")
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def cancel_requested(self):
+        return self._cancel.is_set()
+
+    @property
+    def active(self):
+        return self.status in ("queued", "running")
+
+    def snapshot(self):
+        with self._lock:
+            return {"id": self.id, "status": self.status, "stage": self.stage,
+                    "stages": {stage: list(counts) for stage, counts in self.stages.items()},
+                    "error": self.error, "elapsed": (self.finished or time.time()) - self.created}
+
+
+# Runs jobs on background threads so a long deck never blocks the Streamlit script. Jobs are looked up
+# by id or by key (the report inputs); a finished job's result is handed back instead of running again.
+class JobEngine:
+    def __init__(self, max_workers=1, max_finished=8):
+        self.max_finished = max_finished
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="deck-job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, key=None, **kwargs):
+        # fn(job, *args, **kwargs) returns the job's result and calls job.update() as it goes
+        with self._lock:
+            existing = self._find(key)
+            if existing is not None and existing.status in ("queued", "running", "done"):
+                return existing
+            job = Job(key)
+            self._jobs[job.id] = job
+            self._prune()
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def _run(self, job, fn, args, kwargs):
+        job.status = "running"
+        try:
+            if job.cancel_requested:
+                raise JobCancelled("Cancelled before start")
+            job.result = fn(job, *args, **kwargs)
+            job.status = "done"
+        except JobCancelled:
+            job.status = "cancelled"
+        except Exception as e:
+            job.error = f"{type(e).__name__}: {e}"
+            job.status = "failed"
+        finally:
+            job.finished = time.time()
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def find(self, key):
+        with self._lock:
+            return self._find(key)
+
+    def _find(self, key):
+        if key is None:
+            return None
+        matches = [job for job in self._jobs.values() if job.key == key]
+        return max(matches, key=lambda job: job.created) if matches else None
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job is not None:
+            job.cancel()
+        return job
+
+    def _prune(self):
+        # Keep every active job and only the newest finished ones
+        finished = sorted((job for job in self._jobs.values() if not job.active), key=lambda job: job.created)
+        for job in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job.id]
+
+    def shutdown(self):
+        for job in list(self._jobs.values()):
+            job.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,175 @@
+# agents/llm_backends.py
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+import urllib.request
+import ollama
+
+# Every backend answers generate(prompt, options, stream) in Ollama's shape: a dict-like response with
+# "response" (and token counts when known), or with stream=True an iterator of such chunks whose last
+# one has done=True. Closing a stream stops generation. calls counts requests, for benchmarks.
+class LLMBackend:
+    name = "base"
+
+    def __init__(self, model):
+        self.model = model
+        self.calls = 0
+
+    @property
+    def identity(self):
+        # Where answers come from, for cache keys; two backends with equal identities give interchangeable answers
+        return {"backend": self.name}
+
+    def generate(self, prompt, options=None, stream=False):
+        raise NotImplementedError
+
+
+class OllamaBackend(LLMBackend):
+    name = "ollama"
+
+    def __init__(self, model="llama3.2", host=None):
+        super().__init__(model)
+        self.host = host  # None uses OLLAMA_HOST or the local default
+        self._client = ollama.Client(host=host) if host else None
+
+    @property
+    def identity(self):
+        return {"backend": self.name, "host": self.host or os.environ.get("OLLAMA_HOST")}
+
+    def generate(self, prompt, options=None, stream=False):
+        self.calls += 1
+        generate = self._client.generate if self._client is not None else ollama.generate
+        return generate(model=self.model, prompt=prompt, options=options, stream=stream)
+
+
+# Ollama option names mapped to their OpenAI request fields
+_OPENAI_OPTIONS = {"temperature": "temperature", "top_p": "top_p", "num_predict": "max_tokens", "seed": "seed", "stop": "stop"}
+
+class OpenAICompatibleBackend(LLMBackend):
+    # Any server exposing /v1/chat/completions: llama.cpp, vLLM, LM Studio or Ollama's own /v1 endpoint
+    name = "openai"
+
+    def __init__(self, model="llama3.2", base_url="http://localhost:11434/v1", api_key=None, timeout=120):
+        super().__init__(model)
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key or os.environ.get("OPENAI_API_KEY")
+        self.timeout = timeout
+
+    @property
+    def identity(self):
+        return {"backend": self.name, "base_url": self.base_url}
+
+    def generate(self, prompt, options=None, stream=False):
+        self.calls += 1
+        body = {"model": self.model, "messages": [{"role": "user", "content": prompt}], "stream": stream}
+        body.update({_OPENAI_OPTIONS[key]: value for key, value in (options or {}).items() if key in _OPENAI_OPTIONS})
+        if stream:
+            body["stream_options"] = {"include_usage": True}
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        request = urllib.request.Request(f"{self.base_url}/chat/completions", data=json.dumps(body).encode("utf-8"), headers=headers)
+        response = urllib.request.urlopen(request, timeout=self.timeout)
+        if stream:
+            return self._stream(response)
+        with response:
+            result = json.load(response)
+        return {"response": result["choices"][0]["message"]["content"] or "", "done": True, **self._counts(result.get("usage"))}
+
+    def _stream(self, response):
+        # Server-sent events; the connection is closed when the caller closes this generator
+        counts = {}
+        try:
+            for line in response:
+                line = line.decode("utf-8").strip()
+                if not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+                event = json.loads(data)
+                counts = self._counts(event.get("usage")) or counts
+                for choice in event.get("choices") or []:
+                    piece = (choice.get("delta") or {}).get("content")
+                    if piece:
+                        yield {"response": piece, "done": False}
+            yield {"response": "", "done": True, **counts}
+        finally:
+            response.close()
+
+    @staticmethod
+    def _counts(usage):
+        if not usage:
+            return {}
+        return {"prompt_eval_count": usage.get("prompt_tokens"), "eval_count": usage.get("completion_tokens")}
+
+
+class FakeBackend(LLMBackend):
+    # Deterministic in-process stand-in: the answer depends only on the prompt. latency is the time to the
+    # first token, tokens_per_second paces the rest, and failure_rate raises on that share of calls.
+    name = "fake"
+
+    def __init__(self, model="fake", latency=0.0, tokens_per_second=None, points=7, failure_rate=0.0, seed=0):
+        super().__init__(model)
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.points = points
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @property
+    def identity(self):
+        return {"backend": self.name, "points": self.points}
+
+    def answer(self, prompt):
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8]
+        return "\n".join(f"Insight {i + 1} for case {digest} shows a measurable pattern in the data." for i in range(self.points))
+
+    def generate(self, prompt, options=None, stream=False):
+        with self._lock:
+            self.calls += 1
+            fail = self.failure_rate > 0 and self._random.random() < self.failure_rate
+        time.sleep(self.latency)
+        if fail:
+            raise RuntimeError("Injected backend failure")
+        tokens = self.answer(prompt).split(" ")
+        tokens = [token if i == 0 else " " + token for i, token in enumerate(tokens)]
+        if options and options.get("num_predict"):
+            tokens = tokens[:options["num_predict"]]
+        counts = {"prompt_eval_count": len(prompt.split()), "eval_count": len(tokens)}
+        if not stream:
+            time.sleep(self._token_delay() * len(tokens))
+            return {"response": "".join(tokens), "done": True, **counts}
+        return self._stream(tokens, counts)
+
+    def _token_delay(self):
+        return 1 / self.tokens_per_second if self.tokens_per_second else 0
+
+    def _stream(self, tokens, counts):
+        delay = self._token_delay()
+        for token in tokens:
+            if delay:
+                time.sleep(delay)
+            yield {"response": token, "done": False}
+        yield {"response": "", "done": True, **counts}
+
+
+BACKENDS = {"ollama": OllamaBackend, "openai": OpenAICompatibleBackend, "fake": FakeBackend}
+
+def backend_from_env(model="llama3.2"):
+    # PPT_LLM_BACKEND picks the backend (ollama by default), PPT_LLM_URL its server and PPT_LLM_MODEL the model,
+    # so the app, batch workers and benchmarks can be pointed elsewhere without code changes
+    kind = os.environ.get("PPT_LLM_BACKEND", "ollama")
+    if kind not in BACKENDS:
+        raise ValueError(f"Unknown LLM backend: {kind}")
+    model = os.environ.get("PPT_LLM_MODEL", model)
+    url = os.environ.get("PPT_LLM_URL")
+    if kind == "ollama":
+        return OllamaBackend(model, host=url)
+    if kind == "openai":
+        return OpenAICompatibleBackend(model, base_url=url) if url else OpenAICompatibleBackend(model)
+    return FakeBackend()
@@ -0,0 +1,211 @@
+# agents/office_pool.py
+import atexit
+import os
+import queue
+import shutil
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+import warnings
+from concurrent.futures import Future
+from pathlib import Path
+from .tracing import traced, annotate
+
+try:
+    import uno
+    from com.sun.star.beans import PropertyValue
+except ImportError:  # Without LibreOffice's Python bindings each job runs a one-shot --convert-to instead
+    uno = None
+
+FILTERS = {"pdf": "impress_pdf_Export", "odp": "impress8"}
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def _property(name, value):
+    prop = PropertyValue()
+    prop.Name = name
+    prop.Value = value
+    return prop
+
+
+class _OfficeWorker:
+    # One long-lived headless soffice listener with a private user profile
+    def __init__(self, soffice, startup_timeout):
+        self.soffice = soffice
+        self.startup_timeout = startup_timeout
+        self.profile_dir = tempfile.mkdtemp(prefix="soffice-profile-")
+        self.process = None
+        self.desktop = None
+        self.job_started = None  # monotonic time of the running job, read by the pool's watchdog
+        self.timed_out = False
+
+    def profile_arg(self):
+        return f"-env:UserInstallation={Path(self.profile_dir).as_uri()}"
+
+    def start(self):
+        if uno is None:
+            return
+        port = _free_port()
+        self.process = subprocess.Popen(
+            [self.soffice, "--headless", "--invisible", "--nologo", "--norestore", "--nodefault", self.profile_arg(),
+             f"--accept=socket,host=127.0.0.1,port={port};urp;StarOffice.ComponentContext"],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        local = uno.getComponentContext()
+        resolver = local.ServiceManager.createInstanceWithContext("com.sun.star.bridge.UnoUrlResolver", local)
+        deadline = time.monotonic() + self.startup_timeout
+        while True:
+            try:
+                context = resolver.resolve(f"uno:socket,host=127.0.0.1,port={port};urp;StarOffice.ComponentContext")
+                break
+            except Exception:
+                if self.process.poll() is not None or time.monotonic() > deadline:
+                    self.stop()
+                    raise RuntimeError("LibreOffice listener did not start")
+                time.sleep(0.25)
+        self.desktop = context.ServiceManager.createInstanceWithContext("com.sun.star.frame.Desktop", context)
+
+    def alive(self):
+        return uno is None or (self.process is not None and self.process.poll() is None)
+
+    def stop(self):
+        self.desktop = None
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        self.process = None
+
+    def restart(self):
+        self.stop()
+        self.start()
+
+    def convert(self, src, dst, export_format, timeout):
+        if uno is None:
+            # One-shot conversion, still isolated by this worker's profile and the job's own directory
+            subprocess.run(
+                [self.soffice, "--headless", self.profile_arg(), "--convert-to", export_format, "--outdir", os.path.dirname(dst), src],
+                check=True, timeout=timeout, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            )
+            return
+        doc = self.desktop.loadComponentFromURL(uno.systemPathToFileUrl(src), "_blank", 0, (_property("Hidden", True),))
+        try:
+            doc.storeToURL(uno.systemPathToFileUrl(dst), (_property("FilterName", FILTERS[export_format]),))
+        finally:
+            doc.close(True)
+
+    def cleanup(self):
+        self.stop()
+        shutil.rmtree(self.profile_dir, ignore_errors=True)
+
+
+# Pool of long-lived LibreOffice workers fed from a job queue. Every job gets a private temp dir,
+# a timeout enforced by a watchdog that kills a stuck office process, and crashed or killed
+# workers are restarted before they take the next job. Workers start on the first conversion.
+class OfficeConversionPool:
+    def __init__(self, size=2, timeout=120, soffice=None, startup_timeout=60):
+        self.size = size
+        self.timeout = timeout
+        self.soffice = soffice or shutil.which("soffice") or shutil.which("libreoffice") or "libreoffice"
+        self.startup_timeout = startup_timeout
+        self._jobs = queue.Queue()
+        self._workers = []
+        self._threads = []
+        self._lock = threading.Lock()
+        self._closed = False
+        self.persistent = uno is not None  # False: every job pays a full office startup
+
+    @traced()
+    def convert(self, pptx, export_format):
+        # pptx is the deck as bytes or a path; returns the converted file's bytes
+        annotate(format=export_format, input_bytes=len(pptx) if isinstance(pptx, (bytes, bytearray)) else None)
+        if export_format not in FILTERS:
+            raise ValueError(f"Unsupported export format: {export_format}")
+        self._ensure_started()
+        future = Future()
+        self._jobs.put((pptx, export_format, future))
+        return future.result()
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Conversion pool is closed")
+            if self._threads:
+                return
+            if not self.persistent:
+                warnings.warn("LibreOffice's Python bindings (uno) are not importable from this interpreter, so every "
+                              "ODP/PDF conversion starts soffice from scratch. Use a Python that ships uno (e.g. the system "
+                              "python3 with python3-uno, or a virtualenv created with --system-site-packages) to keep "
+                              "office listeners running between exports.", RuntimeWarning, stacklevel=4)
+            for _ in range(self.size):
+                worker = _OfficeWorker(self.soffice, self.startup_timeout)
+                thread = threading.Thread(target=self._run, args=(worker,), daemon=True)
+                self._workers.append(worker)
+                self._threads.append(thread)
+                thread.start()
+            threading.Thread(target=self._watchdog, daemon=True).start()
+            atexit.register(self.close)
+
+    def _run(self, worker):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                break
+            pptx, export_format, future = job
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                if not worker.alive() or (uno is not None and worker.process is None):
+                    worker.restart()
+                future.set_result(self._convert_job(worker, pptx, export_format))
+            except Exception as e:
+                if worker.timed_out:
+                    e = TimeoutError(f"Conversion to {export_format} exceeded {self.timeout} seconds")
+                future.set_exception(e)
+                if not worker.alive() or worker.timed_out:
+                    worker.stop()  # Restarted lazily before the next job
+            finally:
+                worker.job_started = None
+                worker.timed_out = False
+        worker.cleanup()
+
+    def _convert_job(self, worker, pptx, export_format):
+        with tempfile.TemporaryDirectory(prefix="convert-") as job_dir:
+            src = os.path.join(job_dir, "report.pptx")
+            if isinstance(pptx, (bytes, bytearray)):
+                with open(src, "wb") as f:
+                    f.write(pptx)
+            else:
+                shutil.copyfile(pptx, src)
+            dst = os.path.join(job_dir, f"report.{export_format}")
+            worker.job_started = time.monotonic()
+            worker.convert(src, dst, export_format, self.timeout)
+            with open(dst, "rb") as f:
+                return f.read()
+
+    def _watchdog(self):
+        while not self._closed:
+            time.sleep(1)
+            for worker in self._workers:
+                started = worker.job_started
+                if started is not None and time.monotonic() - started > self.timeout and worker.process is not None:
+                    worker.timed_out = True
+                    worker.process.kill()  # Unblocks the UNO call, which then fails the job
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        for _ in self._threads:
+            self._jobs.put(None)
+        for thread in self._threads:
+            thread.join(timeout=10)
@@ -0,0 +1,90 @@
+# agents/pdf_renderer.py
+import io
+import textwrap
+from functools import lru_cache
+import matplotlib.image as mpimg
+from matplotlib import font_manager
+from matplotlib.backends.backend_pdf import PdfPages
+from matplotlib.figure import Figure
+from matplotlib.patches import Rectangle
+from .pptx_writer import open_image
+from .tracing import traced, annotate
+
+@lru_cache(maxsize=None)
+def _font_family(font_style):
+    # Fall back to the generic family instead of letting matplotlib warn on every text call
+    try:
+        font_manager.findfont(font_manager.FontProperties(family=font_style), fallback_to_default=False)
+        return font_style
+    except ValueError:
+        return "serif" if "Times" in font_style else "sans-serif"
+
+# Draws SlideBuilderAgent.slide_data straight into a PDF, one page per slide, using the same
+# positions, sizes and theme colors as the PPTX. No office suite is involved. Figures are created
+# without pyplot, so each page is freed as soon as it is written.
+class PdfRenderer:
+    def __init__(self, page_width=10, page_height=7.5):
+        self.page_width = page_width  # Inches, as set on the Presentation by SlideBuilderAgent
+        self.page_height = page_height
+
+    @traced(memory=True)
+    def render(self, slides, title="One Column EDA Report"):
+        buffer = io.BytesIO()
+        with PdfPages(buffer, metadata={"Title": title}) as pdf:
+            for slide in slides:
+                fig = self._draw_slide(slide)
+                pdf.savefig(fig, facecolor=fig.get_facecolor())
+        annotate(slides=len(slides), output_bytes=buffer.tell())
+        return buffer.getvalue()
+
+    def _box(self, left, top, width, height):
+        # PPTX boxes are measured in inches from the top-left corner; figures from the bottom-left
+        return [left / self.page_width, 1 - (top + height) / self.page_height, width / self.page_width, height / self.page_height]
+
+    def _draw_slide(self, slide):
+        fig = Figure(figsize=(self.page_width, self.page_height))
+        fig.patch.set_facecolor("#" + slide["background"])
+        font = _font_family(slide["font"])
+        title_color = "#" + slide["title_color"]
+        text_color = "#" + slide["text_color"]
+
+        # Title, centred in its placeholder box
+        title_top = 3 if slide["cover"] else 0.5
+        fig.text(0.5, 1 - (title_top + 0.5) / self.page_height, textwrap.fill(slide["title"], 40),
+                 ha="center", va="center", fontsize=32, color=title_color, fontfamily=font)
+        if slide["cover"]:
+            return fig
+
+        content = slide["content"]
+        if slide["image"] is not None:
+            ax = fig.add_axes(self._box(1, 1.75, 8, 5))
+            image = slide["image"]
+            ax.imshow(mpimg.imread(open_image(image)), aspect="auto")
+            ax.set_axis_off()
+        elif slide["layout"] == "text" and content:
+            dense = len(content) > 5
+            font_size = 14 if dense else 16
+            space_after = 6 if dense else 8
+            width = int(7 * 72 / (font_size * 0.5))  # Characters per line at roughly half an em each
+            y = 1.75 + 0.05 + 18 * 1.2 / 72  # The text frame starts with one empty paragraph
+            for point in content:
+                lines = textwrap.wrap(f"• {point}", width, subsequent_indent="  ") or [""]
+                for line in lines:
+                    fig.text(1.6 / self.page_width, 1 - y / self.page_height, line,
+                             ha="left", va="top", fontsize=font_size, color=text_color, fontfamily=font)
+                    y += font_size * 1.2 / 72
+                y += space_after / 72
+        elif slide["layout"] == "table" and slide["table_data"]:
+            ax = fig.add_axes(self._box(1.5, 1.75, 7, 4))
+            ax.set_axis_off()
+            table = ax.table(cellText=[[str(cell) for cell in row] for row in slide["table_data"]], bbox=[0, 0, 1, 1])
+            table.auto_set_font_size(False)
+            for cell in table.get_celld().values():
+                cell.get_text().set(fontsize=14, color=text_color, fontfamily=font)
+        elif slide["layout"] == "progress" and slide["progress"] is not None:
+            progress = slide["progress"]
+            fig.add_artist(Rectangle(self._box(1.5, 2, 7 * progress, 0.5)[:2], 7 * progress / self.page_width, 0.5 / self.page_height,
+                                     transform=fig.transFigure, facecolor=title_color, edgecolor="none"))
+            fig.text(1.6 / self.page_width, 1 - 2.65 / self.page_height, f"Progress: {progress*100:.0f}%",
+                     ha="left", va="top", fontsize=14, color=text_color, fontfamily=font)
+        return fig
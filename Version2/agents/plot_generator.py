@@ -1,20 +1,122 @@
 # agents/plot_generator.py
 import matplotlib.pyplot as plt
-import tempfile
+from matplotlib.colors import LogNorm
+import multiprocessing
+import numpy as np
+import os
+import io
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from .tracing import span, traced, annotate
+
+def _init_worker():
+    # Workers never display anything; Agg avoids GUI backends and their per-process state
+    plt.switch_backend("Agg")
+
+def _render_chart(settings, df, col, other_col, plot_type):
+    return PlotGeneratorAgent(**settings).generate_plot(df, col, other_col, plot_type)
 
 class PlotGeneratorAgent:
+    def __init__(self, max_points=50_000, large_data_mode="density", density_bins=200, seed=0, max_workers=None, min_parallel_charts=4,
+                 figsize=(8, 5), dpi=100, style=None, cache=None):
+        self.max_points = max_points  # Scatter plots above this many rows use large_data_mode
+        self.large_data_mode = large_data_mode  # "density" (2D histogram image) or "sample" (seeded downsample)
+        self.density_bins = density_bins
+        self.seed = seed
+        self.max_workers = max_workers  # Chart rendering processes; None uses every core, 1 renders in-process
+        self.min_parallel_charts = min_parallel_charts  # Fewer charts than this are not worth starting a pool
+        self.figsize = figsize
+        self.dpi = dpi
+        self.style = style  # Optional matplotlib style name applied while drawing
+        self.cache = cache  # ChartCache; used when generate_plots is given a dataset fingerprint
+
+    def _settings(self):
+        return {"max_points": self.max_points, "large_data_mode": self.large_data_mode, "density_bins": self.density_bins,
+                "seed": self.seed, "max_workers": 1, "figsize": self.figsize, "dpi": self.dpi, "style": self.style}
+
+    def cache_key(self, fingerprint, col, other_col, plot_type):
+        # Everything that changes the rendered pixels
+        return (fingerprint, col, other_col, plot_type, tuple(self.figsize), self.dpi, self.style,
+                self.max_points, self.large_data_mode, self.density_bins, self.seed)
+
+    def generate_plots(self, df, col, other_cols, plot_type, fingerprint=None, on_result=None):
+        # Comparison charts are independent, so render them in a process pool; results keep other_cols order
+        charts = self.generate_pair_plots(df, [(col, other_col) for other_col in other_cols], plot_type, fingerprint, on_result)
+        return [charts[(col, other_col)] for other_col in other_cols]
+
+    @traced(memory=True)
+    def generate_pair_plots(self, df, pairs, plot_type, fingerprint=None, on_result=None):
+        # {(col, other_col): (png_bytes, actual_plot_type)} for any set of column pairs, rendered in one pool.
+        # on_result(done, total) is called as charts finish, cached ones first, and may raise to stop early.
+        pairs = list(dict.fromkeys(pairs))
+        results = {}
+        if self.cache is not None and fingerprint is not None:
+            for col, other_col in pairs:
+                cached = self.cache.get(self.cache_key(fingerprint, col, other_col, plot_type))
+                if cached is not None:
+                    results[(col, other_col)] = cached
+        missing = [pair for pair in pairs if pair not in results]
+        cached = len(results)
+        annotate(plot_type=plot_type, charts=len(pairs), cached=cached)
+        if on_result is not None and cached:
+            on_result(cached, len(pairs))
+        report = None if on_result is None else lambda done: on_result(cached + done, len(pairs))
+        for pair, chart in zip(missing, self._render_many(df, missing, plot_type, report)):
+            results[pair] = chart
+            if self.cache is not None and fingerprint is not None:
+                self.cache.put(self.cache_key(fingerprint, *pair, plot_type), *chart)
+        return results
+
+    def _render_many(self, df, pairs, plot_type, report=None):
+        workers = min(self.max_workers or os.cpu_count() or 1, len(pairs))
+        if workers <= 1 or len(pairs) < self.min_parallel_charts:
+            charts = []
+            for col, other_col in pairs:
+                charts.append(self.generate_plot(df, col, other_col, plot_type))
+                if report is not None:
+                    report(len(charts))
+            return charts
+        # spawn rather than fork: the Streamlit server process is multi-threaded
+        context = multiprocessing.get_context("spawn")
+        executor = ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker)
+        # Worker processes have tracers of their own, so pooled charts show up as this one span
+        try:
+            with span("PlotGeneratorAgent.chart_pool", workers=workers, charts=len(pairs)):
+                # Each task pickles only the two columns its chart needs
+                futures = [executor.submit(_render_chart, self._settings(), df[[col, other_col]], col, other_col, plot_type)
+                           for col, other_col in pairs]
+                if report is not None:
+                    for done, _ in enumerate(as_completed(futures), 1):
+                        report(done)
+                charts = [future.result() for future in futures]
+        except BaseException:
+            # Stopped by report(): drop queued charts and leave running ones to finish in the background
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        executor.shutdown()
+        return charts
+
+    @traced()
     def generate_plot(self, df, col, other_col, plot_type):
-        with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as tmp:
-            chart_path = tmp.name
-            plt.figure(figsize=(8, 5))
+        annotate(col=col, other_col=other_col, plot_type=plot_type, rows=len(df))
+        with plt.style.context(self.style or {}):
+            return self._draw(df, col, other_col, plot_type)
+
+    def _draw(self, df, col, other_col, plot_type):
+        fig = plt.figure(figsize=self.figsize)
+        try:
             is_numeric_col = pd.api.types.is_numeric_dtype(df[col])
             is_numeric_other = pd.api.types.is_numeric_dtype(df[other_col])
             actual_plot_type = plot_type
             
             if is_numeric_col and is_numeric_other:
                 if plot_type == "Scatter":
-                    df.plot.scatter(x=col, y=other_col, color='teal', alpha=0.5)
+                    if len(df) > self.max_points and self.large_data_mode == "density":
+                        self._density_scatter(df[col], df[other_col])
+                    elif len(df) > self.max_points:
+                        df.sample(n=self.max_points, random_state=self.seed).plot.scatter(x=col, y=other_col, color='teal', alpha=0.5)
+                    else:
+                        df.plot.scatter(x=col, y=other_col, color='teal', alpha=0.5)
                     plt.title(f"{col} vs {other_col}", fontsize=12)
                 elif plot_type == "Hexbin":
                     plt.hexbin(df[col], df[other_col], gridsize=20, cmap='Blues', mincnt=1)
@@ -47,6 +149,23 @@ class PlotGeneratorAgent:
             plt.xlabel(col, fontsize=10)
             plt.ylabel(other_col, fontsize=10)
             plt.xticks(rotation=45, ha='right', fontsize=8)
-            plt.savefig(chart_path, bbox_inches='tight')
+            buffer = io.BytesIO()
+            with span("plt.savefig", dpi=self.dpi) as s:
+                plt.savefig(buffer, format='png', dpi=self.dpi, bbox_inches='tight')
+                if s is not None:
+                    s.set(image_bytes=buffer.tell())
+            return buffer.getvalue(), actual_plot_type
+        finally:
             plt.close()
-            return chart_path, actual_plot_type
\ No newline at end of file
+            plt.close(fig)  # pandas plots draw on a figure of their own, so close the initial one too
+
+    def _density_scatter(self, x, y):
+        # Bin the points once and draw the counts as an image, so cost no longer grows with the number of markers
+        mask = x.notna() & y.notna()
+        x, y = x[mask].to_numpy(dtype=float), y[mask].to_numpy(dtype=float)
+        counts, x_edges, y_edges = np.histogram2d(x, y, bins=self.density_bins)
+        counts = np.ma.masked_equal(counts.T, 0)
+        plt.imshow(counts, origin='lower', aspect='auto', cmap='Blues', interpolation='nearest',
+                   extent=[x_edges[0], x_edges[-1], y_edges[0], y_edges[-1]],
+                   norm=LogNorm(vmin=1, vmax=max(counts.max(), 1)) if counts.count() else None)
+        plt.colorbar(label='Count')
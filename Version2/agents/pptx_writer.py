@@ -0,0 +1,152 @@
+# agents/pptx_writer.py
+import hashlib
+import io
+import zipfile
+from collections import namedtuple
+from copy import deepcopy
+from pptx.opc.constants import CONTENT_TYPE as CT, RELATIONSHIP_TYPE as RT
+from pptx.opc.oxml import CT_Relationships, CT_Types, serialize_part_xml
+from pptx.opc.packuri import CONTENT_TYPES_URI, PACKAGE_URI, PackURI
+from pptx.opc.spec import default_content_types
+
+_WrittenPart = namedtuple("_WrittenPart", "partname content_type")
+
+# A picture already written into a streamed deck. Slide specs keep this instead of the image bytes
+# and read the picture back from the finished file only when an export or rebuild needs it.
+class MediaRef:
+    def __init__(self, output, membername):
+        self.output = output  # Path or binary stream the deck was streamed to
+        self.membername = membername
+
+    def read(self):
+        source = self.output
+        if hasattr(source, "getvalue"):
+            source = io.BytesIO(source.getvalue())  # Shares the buffer, so concurrent exports do not share a position
+        with zipfile.ZipFile(source) as archive:
+            return archive.read(self.membername)
+
+def open_image(image):
+    # Spec images are PNG bytes, a path on disk, a MediaRef or a binary stream; paths and streams pass through
+    if isinstance(image, (bytes, bytearray)):
+        return io.BytesIO(image)
+    if isinstance(image, MediaRef):
+        return io.BytesIO(image.read())
+    return image
+
+# Streams finished slides into the output .pptx as they are produced. Each slide part, its .rels
+# and any new media are written to the zip immediately and the slide is dropped from the in-memory
+# Presentation, so memory stays flat however many slides a deck has. Masters, layouts, theme and
+# the presentation part itself are written once by close().
+class StreamingPptxWriter:
+    def __init__(self, prs, output):
+        self.prs = prs
+        self.output = output
+        self._zip = zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED)
+        self._slides = []  # Slide partnames in deck order
+        self._written = []  # _WrittenPart for every slide and media item, for [Content_Types].xml
+        self._media = {}  # SHA-1 of image bytes -> partname, so repeated images are stored once
+        self.closed = False
+
+    @property
+    def slide_count(self):
+        return len(self._slides)
+
+    def write_slide(self, slide):
+        # Returns the partnames of the media the slide refers to, in relationship order
+        part = slide.part
+        media = []
+        partname = PackURI(f"/ppt/slides/slide{len(self._slides) + 1}.xml")
+        rels = CT_Relationships.new()
+        for rId, rel in part.rels.items():
+            if rel.is_external:
+                rels.add_rel(rId, rel.reltype, rel.target_ref, True)
+                continue
+            target = rel.target_part
+            if rel.reltype == RT.SLIDE_LAYOUT:
+                target_name = target.partname  # Written with the rest of the template in close()
+            elif not len(target.rels):
+                target_name = self._write_media(target)
+                media.append(target_name)
+            else:
+                raise ValueError(f"Cannot stream slide parts related by {rel.reltype}")
+            rels.add_rel(rId, rel.reltype, target_name.relative_ref(partname.baseURI))
+        self._zip.writestr(partname.membername, part.blob)
+        self._zip.writestr(partname.rels_uri.membername, rels.xml_file_bytes)
+        self._slides.append(partname)
+        self._written.append(_WrittenPart(partname, CT.PML_SLIDE))
+        self._drop_slide(part)
+        return media
+
+    def _write_media(self, part):
+        blob = part.blob
+        digest = hashlib.sha1(blob).hexdigest()
+        if digest not in self._media:
+            # A prefix keeps these names clear of media that ships with the template
+            partname = PackURI(f"/ppt/media/stream{len(self._media) + 1}.{part.partname.ext}")
+            self._zip.writestr(partname.membername, blob)
+            self._media[digest] = partname
+            self._written.append(_WrittenPart(partname, part.content_type))
+        return self._media[digest]
+
+    def _drop_slide(self, slide_part):
+        presentation_part = self.prs.part
+        sldIdLst = self.prs._element.get_or_add_sldIdLst()
+        for sldId in sldIdLst:
+            if presentation_part.related_part(sldId.rId) is slide_part:
+                sldIdLst.remove(sldId)
+                presentation_part.drop_rel(sldId.rId)
+                break
+
+    def close(self):
+        if self.closed:
+            return
+        presentation_part = self.prs.part
+        package = presentation_part.package
+        parts = [part for part in package.iter_parts()]
+        for part in parts:
+            if part is presentation_part:
+                self._write_presentation(part)
+                continue
+            self._zip.writestr(part.partname.membername, part.blob)
+            if len(part.rels):
+                self._zip.writestr(part.partname.rels_uri.membername, part.rels.xml)
+        self._zip.writestr(PACKAGE_URI.rels_uri.membername, package._rels.xml)
+        self._zip.writestr(CONTENT_TYPES_URI.membername, self._content_types(parts))
+        self._zip.close()
+        self.closed = True
+
+    def _write_presentation(self, part):
+        # Rebuild the slide list and its relationships around the slides already in the zip
+        element = deepcopy(part._element)
+        sldIdLst = element.get_or_add_sldIdLst()
+        for sldId in list(sldIdLst):
+            sldIdLst.remove(sldId)
+        rels = CT_Relationships.new()
+        numbers = [0]
+        for rId, rel in part.rels.items():
+            rels.add_rel(rId, rel.reltype, rel.target_ref, rel.is_external)
+            if rId.startswith("rId") and rId[3:].isdigit():
+                numbers.append(int(rId[3:]))
+        next_number = max(numbers) + 1
+        for i, slide_partname in enumerate(self._slides):
+            rId = f"rId{next_number + i}"
+            rels.add_rel(rId, RT.SLIDE, slide_partname.relative_ref(part.partname.baseURI))
+            sldIdLst.add_sldId(rId)
+        self._zip.writestr(part.partname.membername, serialize_part_xml(element))
+        self._zip.writestr(part.partname.rels_uri.membername, rels.xml_file_bytes)
+
+    def _content_types(self, parts):
+        types = CT_Types.new()
+        defaults = {"rels": CT.OPC_RELATIONSHIPS, "xml": CT.XML}
+        overrides = {}
+        for part in list(parts) + self._written:
+            ext = part.partname.ext
+            if (ext.lower(), part.content_type) in default_content_types:
+                defaults[ext.lower()] = part.content_type
+            else:
+                overrides[part.partname] = part.content_type
+        for ext, content_type in sorted(defaults.items()):
+            types.add_default(ext, content_type)
+        for partname, content_type in sorted(overrides.items()):
+            types.add_override(partname, content_type)
+        return serialize_part_xml(types)
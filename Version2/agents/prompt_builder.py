@@ -0,0 +1,124 @@
+# agents/prompt_builder.py
+import math
+import numpy as np
+from .tracing import traced, annotate
+
+# Facts are (score, key, text); higher scores are kept first and the key drops duplicates.
+# A perfect correlation outranks any anomaly; a weak one ranks below them.
+TARGET_SCORE = 1000
+CORRELATION_SCORE = 100
+TARGET_CORRELATION_BONUS = 20
+ANOMALY_SCORE = 60
+COLUMN_SCORE = 10
+
+# Turns DataLoaderAgent statistics into a ranked list of facts that fits a token budget, instead of pasting
+# every column's stats and every correlation into each prompt. All report-level prompts start with the same
+# prefix (dataset shape, request and facts) and end with their own task, so a server that reuses the cached
+# prompt prefix (Ollama keeps the KV cache of the previous prompt) only prefills the short task after the first call.
+class PromptBuilder:
+    def __init__(self, token_budget=800, max_correlations=10, min_correlation=0.1, outlier_z=6.0, chars_per_token=4, count_tokens=None):
+        self.token_budget = token_budget  # Estimated tokens for the whole shared prefix
+        self.max_correlations = max_correlations  # Strongest pairs considered, for the dataset and for the target
+        self.min_correlation = min_correlation  # Weaker correlations are not worth a fact
+        self.outlier_z = outlier_z  # Std from the mean that counts as extreme; Gaussian noise on 10M rows stays below ~5.7
+        self.chars_per_token = chars_per_token
+        self.count_tokens = count_tokens  # Optional exact tokenizer: text -> token count
+
+    def estimate_tokens(self, text):
+        if self.count_tokens is not None:
+            return self.count_tokens(text)
+        return math.ceil(len(text) / self.chars_per_token)
+
+    @traced()
+    def dataset_facts(self, data_loader):
+        # Facts that do not depend on the target column; computed once and shared by every target's prompts
+        stats = data_loader.stats
+        facts = []
+        if stats.corr is not None:
+            strength = np.abs(np.nan_to_num(stats.corr))
+            rows, cols = np.triu_indices(len(strength), k=1)
+            for i in self._strongest(strength[rows, cols]):
+                facts.append(self._correlation_fact(stats, stats.numeric_cols[rows[i]], stats.numeric_cols[cols[i]]))
+        facts.extend(self._anomalies(data_loader))
+        annotate(facts=len(facts))
+        return facts
+
+    def _strongest(self, strength):
+        # Indices of the max_correlations largest values at or above min_correlation, without a full sort
+        count = min(self.max_correlations, len(strength))
+        if not count:
+            return []
+        top = np.argpartition(-strength, count - 1)[:count]
+        return [i for i in top if strength[i] >= self.min_correlation]
+
+    def _correlation_fact(self, stats, col1, col2, bonus=0):
+        r = stats.correlation(col1, col2)
+        key = ("corr",) + tuple(sorted((col1, col2)))
+        return (CORRELATION_SCORE * abs(r) + bonus, key, f"corr({col1}, {col2}) = {r:.2f}")
+
+    def _anomalies(self, data_loader):
+        stats = data_loader.stats
+        facts = []
+        with np.errstate(invalid="ignore", divide="ignore"):
+            high = (stats.max - stats.mean) / stats.std
+            low = (stats.mean - stats.min) / stats.std
+        for i, col in enumerate(stats.numeric_cols):
+            if stats.std[i] == 0:
+                facts.append((ANOMALY_SCORE + 10, ("constant", col), f"{col} is constant at {stats.mean[i]:.2f}"))
+            elif max(high[i], low[i]) >= self.outlier_z:
+                side, z, value = ("max", high[i], stats.max[i]) if high[i] >= low[i] else ("min", low[i], stats.min[i])
+                facts.append((ANOMALY_SCORE + min(z, 20), ("outlier", col), f"{col} has extreme values: {side} {value:.2f} is {z:.1f} std from the mean"))
+        missing = data_loader.df.isna().mean()
+        for col, share in missing[missing > 0].items():
+            facts.append((ANOMALY_SCORE + 20 * share, ("missing", col), f"{col} is {share:.0%} missing"))
+        for i, col in enumerate(stats.columns):
+            if col in stats.numeric_index:
+                continue
+            if stats.unique[i] <= 1:
+                facts.append((ANOMALY_SCORE + 10, ("constant", col), f"{col} has a single value"))
+            elif stats.unique[i] >= data_loader.num_rows:
+                facts.append((ANOMALY_SCORE, ("identifier", col), f"{col} is unique per row (likely an identifier)"))
+        return facts
+
+    def column_facts(self, data_loader, col):
+        # The target's own stats always come first, then its correlations, then short notes on every other column
+        stats = data_loader.stats
+        facts = [(TARGET_SCORE, ("column", col), f"{col} ({data_loader.data_types.get(col, 'unknown')}): {self._describe(stats[col])}")]
+        if col in stats.numeric_index and stats.corr is not None:
+            strength = np.abs(np.nan_to_num(stats.corr[stats.numeric_index[col]]))
+            strength[stats.numeric_index[col]] = 0
+            for i in self._strongest(strength):
+                facts.append(self._correlation_fact(stats, col, stats.numeric_cols[i], bonus=TARGET_CORRELATION_BONUS))
+        for other in data_loader.other_cols:
+            facts.append((COLUMN_SCORE, ("column", other), f"{other}: {self._describe(stats[other])}"))
+        return facts
+
+    @staticmethod
+    def _describe(column_stats):
+        # Moments for numeric columns, distinct count and most frequent value for the rest
+        keys = ("mean", "std", "min", "max") if "mean" in column_stats else ("unique", "top")
+        return ", ".join(f"{key}={column_stats[key]}" for key in keys)
+
+    @traced()
+    def prefix(self, data_loader, col, user_prompt, dataset_facts=None):
+        # Deterministic for the same data, target and request, so every prompt of a report shares it verbatim
+        if dataset_facts is None:
+            dataset_facts = self.dataset_facts(data_loader)
+        header = (f"CSV data analysis: {data_loader.num_rows} rows, {data_loader.num_cols} columns, focus column {col}. "
+                  f"Request: '{user_prompt}'.\nKey facts:")
+        budget = self.token_budget - self.estimate_tokens(header)
+        facts = sorted(self.column_facts(data_loader, col) + list(dataset_facts), key=lambda fact: -fact[0])
+        lines, seen = [], set()
+        for score, key, text in facts:
+            line = f"\n- {text}"
+            cost = self.estimate_tokens(line)
+            if key in seen or cost > budget:
+                continue  # A shorter, lower-ranked fact may still fit
+            seen.add(key)
+            lines.append(line)
+            budget -= cost
+        annotate(facts=len(lines), of=len(facts), tokens=self.token_budget - budget)
+        return header + "".join(lines)
+
+    def task(self, prefix, instruction):
+        return f"{prefix}\n\nTask: {instruction}"
@@ -1,51 +1,180 @@
+import contextvars
+import io
 import os
-import subprocess
-from docx import Document
+import re
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from pptx import Presentation
+from .office_pool import OfficeConversionPool
+from .pdf_renderer import PdfRenderer
+from .docx_renderer import DocxRenderer
+from .deck_model import Deck
+from .slide_builder import SlideBuilderAgent
+from .prompt_builder import PromptBuilder
+from .tracing import span, traced, annotate
+
+def _no_progress(stage, done=0, total=1):
+    pass
 
 class ReportAssemblerAgent:
-    def save_and_convert(self, prs, export_format="odp"):
-        pptx_file = "one_column_eda_report.pptx"
-        output_file = f"one_column_eda_report.{export_format}"
-        prs.save(pptx_file)
+    def __init__(self, conversion_pool=None, pdf_backend="native", prompt_builder=None):
+        # Long-lived LibreOffice workers; they only start on the first ODP/PDF export
+        self.conversion_pool = conversion_pool if conversion_pool else OfficeConversionPool(size=1)
+        self.pdf_backend = pdf_backend  # "native" draws PDFs from slide data, "office" converts the PPTX
+        self.pdf_renderer = PdfRenderer()
+        self.docx_renderer = DocxRenderer()
+        self.prompt_builder = prompt_builder if prompt_builder else PromptBuilder()  # Token budget for the stats in each prompt
+        self.deck = None  # Deck of the last assembled report
+
+    def save_and_convert(self, prs, export_format="odp", pptx_file=None, slides=None):
+        # pptx_file is a deck SlideBuilderAgent already streamed (a path or BytesIO); slides is its slide_data
         try:
-            if export_format == "odp":
-                subprocess.run(["libreoffice", "--headless", "--convert-to", "odp", pptx_file], check=True)
-            elif export_format == "pdf":
-                subprocess.run(["libreoffice", "--headless", "--convert-to", "pdf", pptx_file], check=True)
-            elif export_format == "docx":
-                doc = Document()
-                for slide in prs.slides:
-                    for shape in slide.shapes:
-                        if shape.has_text_frame:
-                            doc.add_paragraph(shape.text_frame.text)
-                        elif shape.shape_type == 13:  # Picture
-                            doc.add_paragraph(f"[Image: {shape.name}]")
-                    doc.add_page_break()
-                doc.save(output_file)
-                return True, open(output_file, "rb").read()
-            with open(output_file, "rb") as f:
-                output_bytes = f.read()
-            os.remove(pptx_file)
-            os.remove(output_file)
-            return True, output_bytes
+            if export_format == "pdf" and self._native_pdf(slides):
+                return True, self.pdf_renderer.render(slides)
+            pptx_bytes = self._pptx_bytes(prs, pptx_file)
+            if pptx_file is not None and export_format == "docx" and slides is None:
+                prs = Presentation(io.BytesIO(pptx_bytes))
+            return True, self._convert(export_format, pptx_bytes, prs, slides)
         except Exception as e:
             return False, f"Error converting to {export_format}: {str(e)}"
 
-    def assemble_report(self, csv_file, col, plot_type, min_slides, user_prompt, theme, font_style, data_loader, content_gen, slide_builder, plot_gen, edited_slides=None):
+    @traced(memory=True)
+    def export_all(self, formats=("pptx", "pdf", "docx"), as_zip=False, prs=None, pptx_file=None, slides=None, deck=None):
+        # The deck is saved once and every format is produced from that one copy, concurrently
+        deck = deck if deck is not None else self.deck
+        if deck is not None and prs is None and pptx_file is None:
+            pptx_file = deck.pptx_file
+            if pptx_file is None:
+                prs = deck.presentation()
+            slides = slides if slides is not None else deck.slides
+        formats = list(dict.fromkeys(formats))
+        try:
+            needs_pptx = any(fmt in ("pptx", "odp") or (fmt == "pdf" and not self._native_pdf(slides)) or (fmt == "docx" and slides is None) for fmt in formats)
+            pptx_bytes = self._pptx_bytes(prs, pptx_file) if needs_pptx else None
+            if pptx_file is not None and "docx" in formats and slides is None:
+                prs = Presentation(io.BytesIO(pptx_bytes))
+        except Exception as e:
+            return False, f"Error saving presentation: {str(e)}"
+        with ThreadPoolExecutor(max_workers=len(formats) or 1) as executor:
+            futures = {fmt: executor.submit(contextvars.copy_context().run, self._convert, fmt, pptx_bytes, prs, slides) for fmt in formats}
+            results = {}
+            for fmt, future in futures.items():
+                try:
+                    results[fmt] = future.result()
+                except Exception as e:
+                    return False, f"Error converting to {fmt}: {str(e)}"
+        if not as_zip:
+            return True, results
+        buffer = io.BytesIO()
+        # Every format is already compressed, so the archive only stores them
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_STORED) as archive:
+            for fmt, data in results.items():
+                archive.writestr(f"one_column_eda_report.{fmt}", data)
+        return True, buffer.getvalue()
+
+    def _native_pdf(self, slides):
+        return self.pdf_backend == "native" and slides is not None
+
+    def _pptx_bytes(self, prs, pptx_file=None):
+        if hasattr(pptx_file, "getvalue"):
+            return pptx_file.getvalue()
+        if pptx_file is not None:
+            with open(pptx_file, "rb") as f:
+                return f.read()
+        with span("Presentation.save", memory=True, slides=len(prs.slides)) as s:
+            buffer = io.BytesIO()
+            prs.save(buffer)
+            if s is not None:
+                s.set(output_bytes=buffer.tell())
+        return buffer.getvalue()
+
+    def _convert(self, export_format, pptx_bytes, prs, slides):
+        with span("ReportAssemblerAgent.convert", format=export_format) as s:
+            data = self._convert_format(export_format, pptx_bytes, prs, slides)
+            if s is not None:
+                s.set(output_bytes=len(data))
+            return data
+
+    def _convert_format(self, export_format, pptx_bytes, prs, slides):
+        if export_format == "pptx":
+            return pptx_bytes
+        if export_format == "pdf" and self._native_pdf(slides):
+            return self.pdf_renderer.render(slides)
+        if export_format in ("odp", "pdf"):
+            return self.conversion_pool.convert(pptx_bytes, export_format)
+        if export_format == "docx":
+            return self.docx_renderer.render(slides if slides is not None else self.docx_renderer.slides_from_presentation(prs))
+        raise ValueError(f"Unsupported export format: {export_format}")
+
+    @traced()
+    def assemble_report(self, csv_file, col, plot_type, min_slides, user_prompt, theme, font_style, data_loader, content_gen, slide_builder, plot_gen, edited_slides=None, on_progress=None):
+        # on_progress(stage, done, total) is called for load, llm, charts and assembly; raising from it stops the build
+        on_progress = on_progress or _no_progress
+        annotate(col=col, plot_type=plot_type, min_slides=min_slides)
+        on_progress("load", 0, 1)
+        success, message = data_loader.load_data(csv_file)
+        if not success:
+            return False, message
+        on_progress("load", 1, 1)
+        return self._build_report(col, plot_type, min_slides, user_prompt, theme, font_style, data_loader, content_gen, slide_builder, plot_gen, edited_slides, on_progress=on_progress)
+
+    @traced()
+    def assemble_all_targets(self, csv_file, plot_type, min_slides, user_prompt, theme, font_style, data_loader, content_gen, plot_gen, targets=None, slide_builder_factory=SlideBuilderAgent, stream_dir=None):
+        # One deck per target column from a single load and stats pass. Each unordered column pair gets one
+        # detailed-insights answer shared by both of its decks, and all charts are rendered in one pool.
+        # Every deck is streamed as it is built, to <stream_dir>/<index>_<column>.pptx or else to memory.
         success, message = data_loader.load_data(csv_file)
         if not success:
             return False, message
+        columns = list(data_loader.df.columns)
+        targets = list(targets) if targets is not None else columns
+        stats = data_loader.stats
+        pairs = {}
+        for col in targets:
+            for other_col in columns:
+                if other_col != col:
+                    c1, c2 = sorted((col, other_col), key=columns.index)
+                    pairs[frozenset((c1, c2))] = (c1, c2)
+        prompts = []
+        for c1, c2 in pairs.values():
+            corr = stats[c1].get(f"corr_with_{c2}", "N/A")
+            stats_content = f"{c1} vs {c2}: Corr={corr}, {c1} {list(islice(stats[c1].items(), 3))}, {c2} {list(islice(stats[c2].items(), 3))}"
+            prompts.append(f"Provide detailed insights for the relationship between {c1} and {c2} based on CSV data: '{stats_content}', in 5 to 6 bullet points based on '{user_prompt}'.")
+        details = dict(zip(pairs, content_gen.generate_many(prompts)))
+        ordered_pairs = [(col, other_col) for col in targets for other_col in columns if other_col != col]
+        shared = {
+            "dataset_facts": self.prompt_builder.dataset_facts(data_loader),
+            "charts": plot_gen.generate_pair_plots(data_loader.df, ordered_pairs, plot_type, fingerprint=data_loader.digest)
+        }
+        decks = {}
+        for i, col in enumerate(targets):
+            shared["details"] = {other_col: details[frozenset((col, other_col))] for other_col in columns if other_col != col}
+            slide_builder = slide_builder_factory()
+            if stream_dir is not None:
+                safe_name = re.sub(r"[^\w.-]+", "_", str(col))
+                slide_builder.stream_to(os.path.join(stream_dir, f"{i}_{safe_name}.pptx"))
+            else:
+                slide_builder.stream_to(io.BytesIO())
+            success, result = self._build_report(col, plot_type, min_slides, user_prompt, theme, font_style, data_loader, content_gen, slide_builder, plot_gen, shared=shared)
+            if not success:
+                return False, result
+            decks[col] = self.deck
+        return True, decks
+
+    @traced()
+    def _build_report(self, col, plot_type, min_slides, user_prompt, theme, font_style, data_loader, content_gen, slide_builder, plot_gen, edited_slides=None, shared=None, on_progress=_no_progress):
+        # shared carries work done once for several targets: dataset_facts, details per other column and charts per pair
+        shared = shared or {}
+        annotate(col=col)
         data_loader.set_column(col)
         
         slide_builder.set_theme(theme)
         slide_builder.set_font_style(font_style)
         
-        # Title slide
-        title_prompt = f"Analyze CSV: Rows={len(data_loader.df)}, Cols={data_loader.num_cols}, Selected={col}. Generate a 5-word title based on data and '{user_prompt}'."
-        cover_title = content_gen.generate_content(title_prompt).split('\n')[0]
-        slide_builder.add_title_slide(cover_title)
+        include_summary = bool(user_prompt) and user_prompt.lower() != "default analysis of one column vs others" and "summary" in user_prompt.lower()
         
-        # Overview slide(s)
+        # Overview slide titles
         slide_titles = ["Overview of Upcoming Slides", "Introduction to Analysis"]
         slide_titles.extend([f"Comparison Plot: {col} vs {other_col}" for other_col in data_loader.other_cols])
         slide_titles.extend([f"Comparison Insights: {col} vs {other_col}" for other_col in data_loader.other_cols])
@@ -53,10 +182,45 @@ class ReportAssemblerAgent:
         extra_slides_needed = min_slides > (2 * data_loader.num_cols)
         if extra_slides_needed:
             slide_titles.append("Index of Slides")
-        if user_prompt.lower() != "default analysis of one column vs others" and "summary" in user_prompt.lower():
+        if include_summary:
             slide_titles.append("Summary of Findings")
         slide_titles.append("Conclusion of Analysis")
         overview_content = [f"{i + 1}. {title}" for i, title in enumerate(slide_titles[2:-1])]
+        
+        # Every LLM prompt is independent of the others, so collect them first and generate concurrently
+        # Report-level prompts share one budgeted prefix of ranked facts and differ only in their closing task
+        context = self.prompt_builder.prefix(data_loader, col, user_prompt, shared.get("dataset_facts"))
+        task = self.prompt_builder.task
+        details = shared.get("details", {})
+        prompts = {}
+        prompts["title"] = f"Analyze CSV: Rows={data_loader.num_rows}, Cols={data_loader.num_cols}, Selected={col}. Generate a 5-word title based on data and '{user_prompt}'."
+        prompts["intro"] = task(context, f"Introduce the analysis of {col} vs the other columns in 5 to 6 bullet points.")
+        for other_col in data_loader.other_cols:
+            if other_col in details:
+                continue
+            corr = data_loader.stats[col].get(f"corr_with_{other_col}", "N/A")
+            stats_content = f"{col} vs {other_col}: Corr={corr}, {col} {list(islice(data_loader.stats[col].items(), 3))}, {other_col} {list(islice(data_loader.stats[other_col].items(), 3))}"
+            prompts[("detail", other_col)] = f"Provide detailed insights for {col} vs {other_col} based on CSV data: '{stats_content}', in 5 to 6 bullet points based on '{user_prompt}'."
+        if include_summary:
+            prompts["summary"] = task(context, f"Summarize the analysis of {col} vs the other columns in 5 to 6 bullet points.")
+            slide_titles.append("Summary of Findings")
+        current_slides = len(slide_titles) + 1
+        num_extra = max(0, min_slides - current_slides)
+        for i in range(num_extra):
+            prompts[("extra", i)] = task(context, f"Provide extra analysis {i + 1} for {col} vs the other columns in 5 to 6 bullet points.")
+        prompts["conclusion"] = task(context, f"Conclude the analysis of {col} vs the other columns in 5 to 6 bullet points.")
+        # Only the first line of the title answer is used, so stop its stream after one line
+        max_points = [1 if key == "title" else 6 for key in prompts]
+        on_progress("llm", 0, len(prompts))
+        answers = content_gen.generate_many(prompts.values(), max_points=max_points, on_result=lambda done, total: on_progress("llm", done, total))
+        responses = dict(zip(prompts, answers))
+        responses.update({("detail", other_col): text for other_col, text in details.items()})
+        
+        # Title slide
+        cover_title = responses["title"].split('\n')[0]
+        slide_builder.add_title_slide(cover_title)
+        
+        # Overview slide(s)
         max_points_per_slide = 6
         for i in range(0, len(overview_content), max_points_per_slide):
             chunk = overview_content[i:i + max_points_per_slide]
@@ -64,21 +228,23 @@ class ReportAssemblerAgent:
             slide_builder.add_slide(title, chunk)
         
         # Introduction slide with CSV analysis
-        stats_summary = "\n".join([f"{col}: {', '.join([f'{k}={v}' for k, v in stats.items()])}" for col, stats in data_loader.stats.items()])
-        intro_prompt = f"Introduce analysis of {col} vs others based on CSV with {len(data_loader.df)} rows, {data_loader.num_cols} columns, focusing on {col}. Use this analysis: '{stats_summary}' in 5 to 6 bullet points based on '{user_prompt}'."
-        intro_text = content_gen.generate_content(intro_prompt)
-        intro_points = content_gen.split_into_bullets(intro_text)
+        intro_points = content_gen.split_into_bullets(responses["intro"])
         slide_builder.add_slide("Introduction to Analysis", intro_points)
         
         # Comparison slides
-        for other_col in data_loader.other_cols:
-            chart_path, actual_plot_type = plot_gen.generate_plot(data_loader.df, col, other_col, plot_type)
-            slide_builder.add_slide(f"Comparison Plot: {col} vs {other_col}", chart_path=chart_path)
+        if "charts" in shared:
+            charts = [shared["charts"][(col, other_col)] for other_col in data_loader.other_cols]
+        else:
+            on_progress("charts", 0, len(data_loader.other_cols))
+            charts = plot_gen.generate_plots(data_loader.df, col, data_loader.other_cols, plot_type, fingerprint=data_loader.digest,
+                                             on_result=lambda done, total: on_progress("charts", done, total))
+        on_progress("assembly", 0, 1)
+        for other_col, (chart_png, actual_plot_type) in zip(data_loader.other_cols, charts):
+            slide_builder.add_slide(f"Comparison Plot: {col} vs {other_col}", image=chart_png)
             
             corr = data_loader.stats[col].get(f"corr_with_{other_col}", "N/A")
-            stats_content = f"{col} vs {other_col}: Corr={corr}, {col} {list(data_loader.stats[col].items())[:3]}, {other_col} {list(data_loader.stats[other_col].items())[:3]}"
             content_points = [
-                f"Rows analyzed: {len(data_loader.df)}. Total entries in CSV.",
+                f"Rows analyzed: {data_loader.num_rows}. Total entries in CSV.",
                 f"Correlation: {corr}. Shows {col} vs {other_col} link." if corr != "N/A" else f"{col} type: {data_loader.data_types[col]}. Non-numeric data detected.",
                 f"{other_col} mean: {data_loader.stats[other_col]['mean']}. Average from CSV data." if 'mean' in data_loader.stats[other_col] else f"{other_col} unique: {data_loader.stats[other_col]['unique']}. Distinct values counted.",
                 f"{other_col} min: {data_loader.stats[other_col]['min']}. Minimum value in CSV." if 'min' in data_loader.stats[other_col] else f"{other_col} top: {data_loader.stats[other_col]['top']}. Most frequent in CSV.",
@@ -87,51 +253,48 @@ class ReportAssemblerAgent:
             ]
             slide_builder.add_slide(f"Comparison Insights: {col} vs {other_col}", content_points, layout="text")
             
-            detail_prompt = f"Provide detailed insights for {col} vs {other_col} based on CSV data: '{stats_content}', in 5 to 6 bullet points based on '{user_prompt}'."
-            detail_text = content_gen.generate_content(detail_prompt)
-            detail_points = content_gen.split_into_bullets(detail_text)
+            detail_points = content_gen.split_into_bullets(responses[("detail", other_col)])
             slide_builder.add_slide(f"Detailed Insights: {col} vs {other_col}", detail_points)
-            
-            os.remove(chart_path)
         
         # Index slide
         if extra_slides_needed:
-            index_content = [f"{i + 1}. {title}" for i, title in enumerate(slide_titles[2:-1])]
-            index_points = content_gen.split_into_bullets("\n".join(index_content))
+            index_points = content_gen.split_into_bullets("\n".join(overview_content))
             slide_builder.add_slide("Index of Slides", index_points)
         
         # Summary slide
-        if user_prompt and user_prompt.lower() != "default analysis of one column vs others" and "summary" in user_prompt.lower():
-            summary_prompt = f"Summarize analysis of {col} vs others based on CSV data with {len(data_loader.df)} rows, {data_loader.num_cols} columns, using this analysis: '{stats_summary}' in 5 to 6 bullet points based on '{user_prompt}'."
-            summary_text = content_gen.generate_content(summary_prompt)
-            summary_points = content_gen.split_into_bullets(summary_text)
+        if include_summary:
+            summary_points = content_gen.split_into_bullets(responses["summary"])
             slide_builder.add_slide("Summary of Findings", summary_points)
-            slide_titles.append("Summary of Findings")
         
         # Additional slides
-        current_slides = len(slide_titles) + 1
-        if current_slides < min_slides:
-            for i in range(min_slides - current_slides):
-                extra_prompt = f"Provide extra analysis for {col} vs others based on CSV data with {len(data_loader.df)} rows, {data_loader.num_cols} columns, using this analysis: '{stats_summary}' in 5 to 6 bullet points based on '{user_prompt}'."
-                extra_text = content_gen.generate_content(extra_prompt)
-                extra_points = content_gen.split_into_bullets(extra_text)
-                slide_builder.add_slide(f"Additional Analysis {i + 1}", extra_points, progress=(i + 1) / (min_slides - current_slides + 1), layout="progress")
-                slide_titles.append(f"Additional Analysis {i + 1}")
+        for i in range(num_extra):
+            extra_points = content_gen.split_into_bullets(responses[("extra", i)])
+            slide_builder.add_slide(f"Additional Analysis {i + 1}", extra_points, progress=(i + 1) / (num_extra + 1), layout="progress")
+            slide_titles.append(f"Additional Analysis {i + 1}")
         
         # Conclusion slide with CSV analysis
-        conclusion_prompt = f"Conclude analysis of {col} vs others based on CSV data with {len(data_loader.df)} rows, {data_loader.num_cols} columns, using this analysis: '{stats_summary}' in 5 to 6 bullet points based on '{user_prompt}'."
-        conclusion_text = content_gen.generate_content(conclusion_prompt)
-        conclusion_points = content_gen.split_into_bullets(conclusion_text)
+        conclusion_points = content_gen.split_into_bullets(responses["conclusion"])
         slide_builder.add_slide("Conclusion of Analysis", conclusion_points)
         
         # Thank You slide
         slide_builder.add_title_slide("Thank You")
         
+        # A streaming slide builder has written every slide already; this completes the file
+        slide_builder.finish()
+        self.deck = Deck(slide_builder)
+        
+        # Edits replace the slides they name instead of being appended as copies
         if edited_slides:
-            for slide_title, slide_content in edited_slides.items():
-                slide_builder.add_slide(slide_title, slide_content)
+            self.deck.apply_edits(edited_slides)
+        on_progress("assembly", 1, 1)
         
         return True, slide_titles[1:]
 
-    def finalize_report(self, export_format):
-        return self.save_and_convert(self.prs, export_format)
\ No newline at end of file
+    @traced()
+    def finalize_report(self, export_format, deck=None):
+        deck = deck if deck is not None else self.deck
+        if deck is None:
+            return False, "No report has been assembled yet"
+        if deck.pptx_file is not None:
+            return self.save_and_convert(None, export_format, pptx_file=deck.pptx_file, slides=deck.slides)
+        return self.save_and_convert(deck.presentation(), export_format, slides=deck.slides)
\ No newline at end of file
@@ -2,11 +2,22 @@
 from pptx import Presentation
 from pptx.util import Inches, Pt
 from pptx.dml.color import RGBColor
+from pptx.oxml.ns import qn
 from pptx.oxml.xmlchemy import OxmlElement
+from pptx.opc.constants import CONTENT_TYPE as CT, RELATIONSHIP_TYPE as RT
+from pptx.opc.packuri import PackURI
+from pptx.parts.slide import SlidePart
+from copy import deepcopy
+from .pptx_writer import StreamingPptxWriter, MediaRef, open_image
+from .tracing import traced, annotate
+import io
 import random
 
+# Placeholder text written into prototype slides and replaced when a slide is stamped
+_PROTOTYPE_TEXT = "\u2060prototype\u2060"
+
 class SlideBuilderAgent:
-    def __init__(self, prs=None, theme="light"):
+    def __init__(self, prs=None, theme="light", stamping=False):
         self.prs = prs if prs else Presentation()
         self.prs.slide_width = Inches(10)
         self.prs.slide_height = Inches(7.5)
@@ -30,6 +41,13 @@ class SlideBuilderAgent:
             "green": RGBColor(0, 128, 0)
         }
         self.font_style = "Arial"  # Default
+        # Stamping clones one pre-styled slide XML per (kind, theme, font) instead of styling every run
+        self.stamping = stamping
+        self._prototypes = {}
+        self._next_slide_number = len(self.prs.slides) + 1
+        self.writer = None  # StreamingPptxWriter once stream_to() is called
+        self._pending_slide = None
+        self.slide_data = []  # What every slide shows, for exporters that do not read the PPTX back
 
     def set_theme(self, theme):
         self.theme = theme
@@ -37,8 +55,22 @@ class SlideBuilderAgent:
     def set_font_style(self, font_style):
         self.font_style = font_style
 
-    def add_slide(self, title, content=None, chart_path=None, layout="text", table_data=None, progress=None):
-        slide_layout = self.prs.slide_layouts[5] if chart_path else self.prs.slide_layouts[1]
+    @traced()
+    def add_slide(self, title, content=None, chart_path=None, layout="text", table_data=None, progress=None, image=None):
+        # image is PNG bytes or a binary stream; chart_path is kept for charts already on disk
+        annotate(layout=layout, picture=bool(chart_path or image), stamping=self.stamping)
+        self.slide_data.append(self.make_spec(title, content, chart_path or image, layout, table_data, progress))
+        if isinstance(image, (bytes, bytearray)):
+            image = io.BytesIO(image)
+        return self._track(self._add_slide(title, content, chart_path or image, layout, table_data, progress))
+
+    def _add_slide(self, title, content=None, picture=None, layout="text", table_data=None, progress=None):
+        if self.stamping and (picture or layout == "text"):
+            return self._stamp_slide(title, content, picture)
+        slide_layout = self.prs.slide_layouts[5] if picture else self.prs.slide_layouts[1]
+        return self._build_slide(slide_layout, title, content, picture, layout, table_data, progress)
+
+    def _build_slide(self, slide_layout, title, content=None, picture=None, layout="text", table_data=None, progress=None):
         slide = self.prs.slides.add_slide(slide_layout)
         slide.background.fill.solid()
         slide.background.fill.fore_color.rgb = self.bg_colors[self.theme]
@@ -55,8 +87,8 @@ class SlideBuilderAgent:
         title_shape.height = Inches(1)
         
         # Content based on layout
-        if chart_path:
-            slide.shapes.add_picture(chart_path, Inches(1), Inches(1.75), Inches(8), Inches(5))
+        if picture:
+            slide.shapes.add_picture(picture, Inches(1), Inches(1.75), Inches(8), Inches(5))
         elif layout == "text" and content:
             textbox_height = Inches(6) if len(content) > 5 else Inches(5.5)
             font_size = Pt(14) if len(content) > 5 else Pt(16)
@@ -91,7 +123,98 @@ class SlideBuilderAgent:
         
         return slide
 
+    @traced()
     def add_title_slide(self, title, bg_color=RGBColor(240, 248, 255)):
+        self.slide_data.append(self.make_spec(title, cover_color=bg_color))
+        return self._track(self._add_title_slide(title, bg_color))
+
+    def _add_title_slide(self, title, bg_color):
+        if self.stamping:
+            return self._stamp_slide(title, kind=("cover", str(bg_color)))
+        return self._build_title_slide(title, bg_color)
+
+    def make_spec(self, title, content=None, picture=None, layout="text", table_data=None, progress=None, cover_color=None):
+        # Plain description of a slide in the current theme and font; render_spec() builds it again
+        if picture is not None and not isinstance(picture, (str, bytes, bytearray)):
+            position = picture.tell()
+            data = picture.read()
+            picture.seek(position)
+            picture = data
+        return {
+            "title": title,
+            "content": list(content) if content else None,
+            "image": picture,  # PNG bytes, a path on disk or a MediaRef once the slide is streamed
+            "layout": layout,
+            "table_data": table_data,
+            "progress": progress,
+            "cover": cover_color is not None,
+            "theme": self.theme,
+            "background": str(cover_color if cover_color is not None else self.bg_colors[self.theme]),
+            "title_color": str(self.title_colors[self.theme]),
+            "text_color": str(self.text_colors[self.theme]),
+            "font": self.font_style
+        }
+
+    def render_spec(self, spec):
+        # Build the slide a spec describes, in the spec's own theme and font, without recording it again
+        theme, font_style = self.theme, self.font_style
+        self.theme, self.font_style = spec["theme"], spec["font"]
+        try:
+            if spec["cover"]:
+                return self._add_title_slide(spec["title"], RGBColor.from_string(spec["background"]))
+            picture = open_image(spec["image"]) if spec["image"] is not None else None
+            return self._add_slide(spec["title"], spec["content"], picture, spec["layout"], spec["table_data"], spec["progress"])
+        finally:
+            self.theme, self.font_style = theme, font_style
+
+    @traced()
+    def replace_slide(self, index, spec):
+        # Re-render one slide in place: build it at the end, move it to the old slide's position and drop the old slide
+        if self.writer is not None:
+            raise RuntimeError("Slides already streamed to disk cannot be replaced")
+        sldIdLst = self.prs._element.get_or_add_sldIdLst()
+        old = sldIdLst[index]
+        self.render_spec(spec)
+        old.addprevious(sldIdLst[-1])
+        sldIdLst.remove(old)
+        self.prs.part.drop_rel(old.rId)
+        # Keep slide partnames sequential so the next added slide cannot reuse a live name
+        self.prs.part.rename_slide_parts([sldId.rId for sldId in sldIdLst])
+        self.slide_data[index] = spec
+        return self.prs.slides[index]
+
+    def stream_to(self, output):
+        # Write finished slides straight into `output` (a path or binary stream) instead of keeping them in self.prs
+        self.writer = StreamingPptxWriter(self.prs, output)
+        self._pending_slide = None
+
+    def _track(self, slide):
+        # The newest slide stays in memory until the next one is added, so callers can still adjust it
+        if self.writer is not None:
+            self._write_pending()
+            self._pending_slide = (slide, len(self.slide_data) - 1)
+        return slide
+
+    def _write_pending(self):
+        if self._pending_slide is None:
+            return
+        slide, index = self._pending_slide
+        media = self.writer.write_slide(slide)
+        spec = self.slide_data[index]
+        if media and isinstance(spec["image"], (bytes, bytearray)):
+            # The picture is in the zip now, so the spec only keeps where to find it
+            spec["image"] = MediaRef(self.writer.output, media[0].membername)
+        self._pending_slide = None
+
+    @traced()
+    def finish(self):
+        annotate(slides=len(self.slide_data), streamed=self.writer is not None)
+        if self.writer is None:
+            return
+        self._write_pending()
+        self.writer.close()
+
+    def _build_title_slide(self, title, bg_color):
         slide_layout = self.prs.slide_layouts[0]
         slide = self.prs.slides.add_slide(slide_layout)
         slide.background.fill.solid()
@@ -106,4 +229,69 @@ class SlideBuilderAgent:
         title_shape.width = Inches(8)
         for shape in slide.shapes:
             if shape.placeholder_format.idx != 0:
-                shape.element.getparent().remove(shape.element)
\ No newline at end of file
+                shape.element.getparent().remove(shape.element)
+        return slide
+
+    def _stamp_slide(self, title, content=None, picture=None, kind=None):
+        if kind is None:
+            kind = "picture" if picture else ("dense" if len(content) > 5 else "text") if content else "title"
+        key = (kind, self.theme, self.font_style)
+        if key not in self._prototypes:
+            self._prototypes[key] = self._make_prototype(kind)
+        prototype, layout_index = self._prototypes[key]
+        slide = self._clone_slide(prototype, self.prs.slide_layouts[layout_index])
+        # Only text and images change between stamped slides; all styling comes with the cloned XML
+        text_runs = slide._element.findall(".//" + qn("a:r"))
+        text_runs[0].text = title
+        if content:
+            template = text_runs[1].getparent()
+            body = template.getparent()
+            for point in content:
+                paragraph = deepcopy(template)
+                paragraph.find(qn("a:r")).text = f"• {point}"  # Icon-like bullet
+                body.append(paragraph)
+            body.remove(template)
+        if picture:
+            slide.shapes.add_picture(picture, Inches(1), Inches(1.75), Inches(8), Inches(5))
+        return slide
+
+    def _make_prototype(self, kind):
+        # Build one slide through the normal python-pptx path, keep a copy of its XML and drop the slide again
+        if kind[0] == "cover":
+            layout_index = 0
+            slide = self._build_title_slide(_PROTOTYPE_TEXT, RGBColor.from_string(kind[1]))
+        elif kind == "picture":
+            layout_index = 5
+            slide = self._build_slide(self.prs.slide_layouts[5], _PROTOTYPE_TEXT)
+        else:
+            layout_index = 1
+            content = [_PROTOTYPE_TEXT] * {"dense": 6, "text": 5, "title": 0}[kind]
+            slide = self._build_slide(self.prs.slide_layouts[1], _PROTOTYPE_TEXT, content)
+        prototype = deepcopy(slide._element)
+        self._remove_slide(slide)
+        # Keep a single bullet paragraph as the template that stamping copies per point
+        for run in prototype.findall(".//" + qn("a:r"))[2:]:
+            paragraph = run.getparent()
+            paragraph.getparent().remove(paragraph)
+        return prototype, layout_index
+
+    def _clone_slide(self, prototype, slide_layout):
+        presentation_part = self.prs.part
+        sldIdLst = self.prs._element.get_or_add_sldIdLst()
+        # Slides added through python-pptx are numbered len + 1, so never fall behind that
+        self._next_slide_number = max(self._next_slide_number, len(sldIdLst) + 1)
+        partname = PackURI(f"/ppt/slides/slide{self._next_slide_number}.xml")
+        self._next_slide_number += 1
+        slide_part = SlidePart(partname, CT.PML_SLIDE, presentation_part.package, deepcopy(prototype))
+        slide_part.relate_to(slide_layout.part, RT.SLIDE_LAYOUT)
+        rId = presentation_part.relate_to(slide_part, RT.SLIDE)
+        sldIdLst.add_sldId(rId)
+        return slide_part.slide
+
+    def _remove_slide(self, slide):
+        sldIdLst = self.prs._element.get_or_add_sldIdLst()
+        for sldId in sldIdLst:
+            if self.prs.part.related_part(sldId.rId) is slide.part:
+                sldIdLst.remove(sldId)
+                self.prs.part.drop_rel(sldId.rId)
+                break
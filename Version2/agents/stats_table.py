@@ -0,0 +1,89 @@
+# agents/stats_table.py
+from collections.abc import Mapping
+import numpy as np
+
+class StatsTable(Mapping):
+    # Typed per-column statistics: float arrays for the numeric reductions and a dense correlation
+    # matrix. Indexing by column returns a ColumnStats view that formats strings only on access,
+    # so DataLoaderAgent.stats keeps its {column: {"mean": "1.23", ...}} shape.
+    def __init__(self, columns, numeric_cols, mean, minimum, maximum, std, unique, top, corr=None):
+        self.columns = list(columns)
+        self.numeric_cols = list(numeric_cols)
+        self.numeric_index = {col: i for i, col in enumerate(self.numeric_cols)}
+        self.column_index = {col: i for i, col in enumerate(self.columns)}
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.min = np.asarray(minimum, dtype=np.float64)
+        self.max = np.asarray(maximum, dtype=np.float64)
+        self.std = np.asarray(std, dtype=np.float64)
+        self.unique = np.asarray(unique, dtype=np.int64)  # Aligned with columns
+        self.top = list(top)  # Aligned with columns; None when a column has no values
+        self.corr = corr if len(self.numeric_cols) > 1 else None  # numeric_cols x numeric_cols
+
+    def __getitem__(self, col):
+        if col not in self.column_index:
+            raise KeyError(col)
+        return ColumnStats(self, col)
+
+    def __iter__(self):
+        return iter(self.columns)
+
+    def __len__(self):
+        return len(self.columns)
+
+    def correlation(self, col1, col2):
+        if self.corr is None or col1 not in self.numeric_index or col2 not in self.numeric_index:
+            return None
+        return float(self.corr[self.numeric_index[col1], self.numeric_index[col2]])
+
+
+class ColumnStats(Mapping):
+    _numeric_keys = ("mean", "min", "max", "std")
+
+    def __init__(self, table, col):
+        self.table = table
+        self.col = col
+
+    def _keys(self):
+        table = self.table
+        if self.col in table.numeric_index:
+            yield from self._numeric_keys
+        yield "unique"
+        yield "top"
+        if table.corr is not None and self.col in table.numeric_index:
+            for other in table.numeric_cols:
+                if other != self.col:
+                    yield f"corr_with_{other}"
+
+    def __contains__(self, key):
+        # Answered without formatting any values
+        table = self.table
+        if key in self._numeric_keys:
+            return self.col in table.numeric_index
+        if key in ("unique", "top"):
+            return True
+        if isinstance(key, str) and key.startswith("corr_with_"):
+            other = key[len("corr_with_"):]
+            return other != self.col and table.correlation(self.col, other) is not None
+        return False
+
+    def __getitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        table = self.table
+        if key == "unique":
+            return str(table.unique[table.column_index[self.col]])
+        if key == "top":
+            top = table.top[table.column_index[self.col]]
+            return str(top) if top is not None else "N/A"
+        if key.startswith("corr_with_"):
+            return f"{table.correlation(self.col, key[len('corr_with_'):]):.2f}"
+        return f"{getattr(table, key)[table.numeric_index[self.col]]:.2f}"
+
+    def __iter__(self):
+        return self._keys()
+
+    def __len__(self):
+        return sum(1 for _ in self._keys())
+
+    def __repr__(self):
+        return repr(dict(self))
@@ -0,0 +1,247 @@
+# agents/streaming_stats.py
+import warnings
+import numpy as np
+import pandas as pd
+from .stats_table import StatsTable
+
+# Mergeable accumulators for computing DataLoaderAgent statistics in one pass over CSV chunks.
+# Each accumulator exposes update(chunk_data) and merge(other), so partial results from separate
+# chunks (or separate workers) can be combined without revisiting the rows.
+
+class RunningMoments:
+    # Welford/Chan mean and variance plus min/max, vectorized over a fixed set of columns
+    def __init__(self, num_cols):
+        self.count = np.zeros(num_cols)
+        self.mean = np.zeros(num_cols)
+        self.m2 = np.zeros(num_cols)
+        self.min = np.full(num_cols, np.inf)
+        self.max = np.full(num_cols, -np.inf)
+
+    def update(self, values):
+        mask = ~np.isnan(values)
+        count = mask.sum(axis=0).astype(float)
+        filled = np.where(mask, values, 0.0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(count > 0, filled.sum(axis=0) / count, 0.0)
+        m2 = np.where(mask, (values - mean) ** 2, 0.0).sum(axis=0)
+        other = RunningMoments(values.shape[1])
+        other.count, other.mean, other.m2 = count, mean, m2
+        other.min = np.where(mask, values, np.inf).min(axis=0, initial=np.inf)
+        other.max = np.where(mask, values, -np.inf).max(axis=0, initial=-np.inf)
+        self.merge(other)
+
+    def merge(self, other):
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        with np.errstate(invalid="ignore", divide="ignore"):
+            self.mean = np.where(total > 0, self.mean + delta * other.count / total, 0.0)
+            self.m2 = np.where(total > 0, self.m2 + other.m2 + delta ** 2 * self.count * other.count / total, 0.0)
+        self.count = total
+        self.min = np.minimum(self.min, other.min)
+        self.max = np.maximum(self.max, other.max)
+
+    def std(self):
+        # Sample standard deviation (ddof=1), matching pandas
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.count > 1, np.sqrt(self.m2 / (self.count - 1)), np.nan)
+
+    def finalize(self, values):
+        return np.where(self.count > 0, values, np.nan)
+
+
+class HyperLogLog:
+    # Approximate distinct counter; 2**precision one-byte registers (16 KiB at the default precision)
+    def __init__(self, precision=14):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def update(self, series):
+        series = series.dropna()
+        if series.empty:
+            return
+        if series.dtype.kind in "iuf":
+            # read_csv gives a chunk with missing values float64 and one without int64; 19 and 19.0 must hash alike
+            series = series.astype(np.float64)
+        hashes = pd.util.hash_pandas_object(series, index=False).to_numpy(dtype=np.uint64)
+        suffix_bits = 64 - self.precision
+        index = (hashes >> np.uint64(suffix_bits)).astype(np.int64)
+        rest = hashes & np.uint64((1 << suffix_bits) - 1)
+        # Rank is the position of the first set bit in the remaining bits
+        _, exponent = np.frexp(rest.astype(np.float64))
+        rank = np.where(rest == 0, suffix_bits + 1, suffix_bits - exponent + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def count(self):
+        m = float(len(self.registers))
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.power(2.0, -self.registers.astype(np.float64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            # Linear counting is far more accurate for small cardinalities
+            estimate = m * np.log(m / zeros)
+        return int(round(estimate))
+
+
+class HeavyHitters:
+    # Bounded top-k frequency summary; merging sums counts and keeps the `capacity` largest candidates
+    def __init__(self, capacity=64):
+        self.capacity = capacity
+        self.counts = {}
+
+    def update(self, series):
+        counts = series.value_counts(dropna=True)
+        other = HeavyHitters(self.capacity)
+        other.counts = dict(zip(counts.index[:self.capacity], counts.to_numpy()[:self.capacity]))
+        self.merge(other)
+
+    def merge(self, other):
+        for value, count in other.counts.items():
+            self.counts[value] = self.counts.get(value, 0) + count
+        if len(self.counts) > self.capacity:
+            ordered = sorted(self.counts.items(), key=lambda item: item[1], reverse=True)
+            self.counts = dict(ordered[:self.capacity])
+
+    def top(self):
+        if not self.counts:
+            return None
+        return max(self.counts.items(), key=lambda item: item[1])[0]
+
+
+class CorrelationSums:
+    # Pairwise-complete co-moment sums for Pearson correlation, matching DataFrame.corr()
+    def __init__(self, num_cols):
+        self.shift = None  # First chunk's means, subtracted to keep the raw sums well conditioned
+        self.n = np.zeros((num_cols, num_cols))
+        self.sum_x = np.zeros((num_cols, num_cols))
+        self.sum_xx = np.zeros((num_cols, num_cols))
+        self.sum_xy = np.zeros((num_cols, num_cols))
+
+    def update(self, values):
+        if self.shift is None:
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", RuntimeWarning)  # All-NaN columns in the first chunk
+                self.shift = np.nan_to_num(np.nanmean(values, axis=0)) if len(values) else np.zeros(values.shape[1])
+        mask = (~np.isnan(values)).astype(float)
+        centered = np.where(mask > 0, values - self.shift, 0.0)
+        # sum_x[i, j] sums column i over rows where column j is also present
+        self.n += mask.T @ mask
+        self.sum_x += centered.T @ mask
+        self.sum_xx += (centered ** 2).T @ mask
+        self.sum_xy += centered.T @ centered
+
+    def merge(self, other):
+        if other.shift is None:
+            return
+        if self.shift is None:
+            self.shift = other.shift
+            self.n, self.sum_x, self.sum_xx, self.sum_xy = other.n.copy(), other.sum_x.copy(), other.sum_xx.copy(), other.sum_xy.copy()
+            return
+        # Re-express the other sums around this accumulator's shift before adding them
+        d = other.shift - self.shift
+        sum_x = other.sum_x + d[:, None] * other.n
+        sum_xx = other.sum_xx + 2 * d[:, None] * other.sum_x + (d[:, None] ** 2) * other.n
+        sum_xy = other.sum_xy + d[:, None] * other.sum_x.T + d[None, :] * other.sum_x + np.outer(d, d) * other.n
+        self.n += other.n
+        self.sum_x += sum_x
+        self.sum_xx += sum_xx
+        self.sum_xy += sum_xy
+
+    def corr(self):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            cov = self.n * self.sum_xy - self.sum_x * self.sum_x.T
+            var = self.n * self.sum_xx - self.sum_x ** 2
+            corr = cov / np.sqrt(var * var.T)
+        corr[(self.n < 2) | (var <= 0) | (var.T <= 0)] = np.nan
+        return np.clip(corr, -1.0, 1.0)
+
+
+class StreamingStats:
+    # Single-pass statistics over CSV chunks, plus a seeded uniform row sample for plotting
+    def __init__(self, sample_rows=200_000, seed=0, hll_precision=14, heavy_hitters=64):
+        self.sample_rows = sample_rows
+        self.rng = np.random.default_rng(seed)
+        self.hll_precision = hll_precision
+        self.heavy_hitters = heavy_hitters
+        self.columns = None
+        self.dtypes = {}
+        self.numeric_cols = []
+        self.num_rows = 0
+        self.moments = None
+        self.correlations = None
+        self.distinct = {}
+        self.frequent = {}
+        self.sample = None
+        self._sample_keys = None
+
+    def update(self, chunk):
+        if self.columns is None:
+            self.columns = list(chunk.columns)
+            self.dtypes = {col: chunk[col].dtype for col in self.columns}
+            self.numeric_cols = [col for col in self.columns if pd.api.types.is_numeric_dtype(chunk[col])]
+            self.moments = RunningMoments(len(self.numeric_cols))
+            self.correlations = CorrelationSums(len(self.numeric_cols))
+            self.distinct = {col: HyperLogLog(self.hll_precision) for col in self.columns}
+            self.frequent = {col: HeavyHitters(self.heavy_hitters) for col in self.columns}
+        self._merge_dtypes(chunk)
+        self.num_rows += len(chunk)
+        if self.numeric_cols:
+            values = chunk[self.numeric_cols].to_numpy(dtype=np.float64, na_value=np.nan)
+            self.moments.update(values)
+            self.correlations.update(values)
+        for col in self.columns:
+            self.distinct[col].update(chunk[col])
+            self.frequent[col].update(chunk[col])
+        self._update_sample(chunk)
+
+    def _merge_dtypes(self, chunk):
+        # A column that stops parsing as numeric in a later chunk is treated as non-numeric, as read_csv would
+        for col in self.columns:
+            seen, dtype = self.dtypes[col], chunk[col].dtype
+            if seen == dtype:
+                continue
+            both_numeric = pd.api.types.is_numeric_dtype(seen) and pd.api.types.is_numeric_dtype(dtype)
+            self.dtypes[col] = np.dtype("float64") if both_numeric else np.dtype("object")
+            if not both_numeric and col in self.numeric_cols:
+                self._drop_numeric(col)
+
+    def _drop_numeric(self, col):
+        keep = [i for i, c in enumerate(self.numeric_cols) if c != col]
+        self.numeric_cols = [self.numeric_cols[i] for i in keep]
+        for name in ("count", "mean", "m2", "min", "max"):
+            setattr(self.moments, name, getattr(self.moments, name)[keep])
+        corr = self.correlations
+        if corr.shift is not None:
+            corr.shift = corr.shift[keep]
+        for name in ("n", "sum_x", "sum_xx", "sum_xy"):
+            setattr(corr, name, getattr(corr, name)[np.ix_(keep, keep)])
+
+    def _update_sample(self, chunk):
+        # Reservoir sampling by random priority: keeping the smallest keys overall is a uniform sample
+        keys = self.rng.random(len(chunk))
+        if self.sample is None:
+            candidates, candidate_keys = chunk, keys
+        else:
+            candidates = pd.concat([self.sample, chunk], ignore_index=True)
+            candidate_keys = np.concatenate([self._sample_keys, keys])
+        if len(candidates) > self.sample_rows:
+            keep = np.sort(np.argpartition(candidate_keys, self.sample_rows)[:self.sample_rows])
+            candidates, candidate_keys = candidates.iloc[keep], candidate_keys[keep]
+        self.sample = candidates.reset_index(drop=True)
+        self._sample_keys = candidate_keys
+
+    def data_types(self):
+        return {col: str(self.dtypes[col]) for col in self.columns}
+
+    def to_stats(self):
+        # Same StatsTable that DataLoaderAgent.analyze_data produces
+        moments = self.moments
+        unique = [self.distinct[col].count() for col in self.columns]
+        top = [self.frequent[col].top() for col in self.columns]
+        # An int column with missing values in some chunks loads as float64, so its mode shows as one too
+        top = [np.float64(value) if value is not None and self.dtypes[col].kind == "f" else value for col, value in zip(self.columns, top)]
+        corr = self.correlations.corr() if len(self.numeric_cols) > 1 else None
+        return StatsTable(self.columns, self.numeric_cols, moments.finalize(moments.mean), moments.finalize(moments.min),
+                          moments.finalize(moments.max), moments.std(), unique, top, corr)
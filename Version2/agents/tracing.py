@@ -0,0 +1,168 @@
+# agents/tracing.py
+import contextvars
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+_HAS_STATM = os.path.exists("/proc/self/statm")
+
+def _rss():
+    if not _HAS_STATM:
+        return None
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * _PAGE_SIZE
+
+
+class Span:
+    __slots__ = ("id", "name", "attrs", "parent", "root_id", "thread_id", "start", "end", "child_time", "rss_start", "rss_end", "heap_start", "heap_end")
+
+    def __init__(self, span_id, name, attrs, parent, memory=False):
+        self.id = span_id
+        self.name = name
+        self.attrs = attrs
+        self.parent = parent
+        self.root_id = parent.root_id if parent is not None else span_id
+        self.thread_id = threading.get_ident()
+        self.child_time = 0.0
+        # Memory is sampled only where asked for; reading statm on every span would dominate its cost
+        self.rss_start = _rss() if memory else None
+        self.heap_start = tracemalloc.get_traced_memory()[0] if memory and tracemalloc.is_tracing() else None
+        self.start = time.perf_counter()
+        self.end = None
+        self.rss_end = None
+        self.heap_end = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    @property
+    def duration(self):
+        return (self.end if self.end is not None else time.perf_counter()) - self.start
+
+    def memory_deltas(self):
+        deltas = {}
+        if self.rss_start is not None and self.rss_end is not None:
+            deltas["rss_delta_kb"] = (self.rss_end - self.rss_start) // 1024
+        if self.heap_start is not None and self.heap_end is not None:
+            deltas["heap_delta_kb"] = (self.heap_end - self.heap_start) // 1024
+        return deltas
+
+
+# Nested, timed spans. The active span follows contextvars, so nesting is kept inside a thread and in
+# pool threads started with contextvars.copy_context(). A span costs two clock reads; root spans and
+# spans opened with memory=True also read /proc/self/statm, and heap deltas while tracemalloc is tracing.
+# Finished spans are kept in a bounded ring buffer and can be exported as Chrome trace-event JSON or
+# summarized per span name.
+class Tracer:
+    def __init__(self, enabled=True, max_spans=50_000):
+        self.enabled = enabled
+        self.spans = deque(maxlen=max_spans)
+        self.epoch = time.perf_counter()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name, memory=False, **attrs):
+        if not self.enabled:
+            yield None
+            return
+        parent = _current_span.get()
+        span = Span(next(self._ids), name, attrs, parent, memory=memory or parent is None)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.attrs["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span.end = time.perf_counter()
+            if span.rss_start is not None:
+                span.rss_end = _rss()
+            if span.heap_start is not None and tracemalloc.is_tracing():
+                span.heap_end = tracemalloc.get_traced_memory()[0]
+            _current_span.reset(token)
+            with self._lock:
+                # Children may finish concurrently on pool threads
+                if parent is not None:
+                    parent.child_time += span.end - span.start
+                self.spans.append(span)
+
+    def traced(self, name=None, memory=False, **attrs):
+        # Decorator form of span(); the name defaults to Class.method
+        def decorate(fn):
+            span_name = name or fn.__qualname__
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.span(span_name, memory=memory, **attrs):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def current(self):
+        return _current_span.get()
+
+    def _select(self, root=None):
+        with self._lock:
+            spans = list(self.spans)
+        if root is not None:
+            spans = [span for span in spans if span.root_id == root.root_id]
+        return spans
+
+    def chrome_trace(self, root=None):
+        # Complete ("X") events, loadable in chrome://tracing or Perfetto
+        pid = os.getpid()
+        events = []
+        for span in self._select(root):
+            args = {key: value if isinstance(value, (int, float, str, bool)) or value is None else str(value)
+                    for key, value in span.attrs.items()}
+            args.update(span.memory_deltas())
+            events.append({"name": span.name, "ph": "X", "pid": pid, "tid": span.thread_id,
+                           "ts": round((span.start - self.epoch) * 1e6, 1), "dur": round(span.duration * 1e6, 1), "args": args})
+        return {"traceEvents": sorted(events, key=lambda event: event["ts"]), "displayTimeUnit": "ms"}
+
+    def export_chrome(self, path, root=None):
+        with open(path, "w") as f:
+            json.dump(self.chrome_trace(root), f)
+
+    def breakdown(self, root=None):
+        # Per span name: calls, total and self time in ms, slowest call and summed memory deltas; slowest first
+        rows = {}
+        for span in self._select(root):
+            row = rows.setdefault(span.name, {"span": span.name, "calls": 0, "total_ms": 0.0, "self_ms": 0.0, "max_ms": 0.0, "rss_delta_kb": 0})
+            duration = span.duration * 1000
+            row["calls"] += 1
+            row["total_ms"] += duration
+            row["self_ms"] += max(0.0, duration - span.child_time * 1000)
+            row["max_ms"] = max(row["max_ms"], duration)
+            row["rss_delta_kb"] += span.memory_deltas().get("rss_delta_kb", 0)
+        for row in rows.values():
+            for key in ("total_ms", "self_ms", "max_ms"):
+                row[key] = round(row[key], 2)
+        return sorted(rows.values(), key=lambda row: row["total_ms"], reverse=True)
+
+    def clear(self):
+        with self._lock:
+            self.spans.clear()
+
+
+# Process-wide tracer used by the agents; PPT_TRACING=0 turns it off and PPT_TRACEMALLOC=1 adds heap deltas
+tracer = Tracer(enabled=os.environ.get("PPT_TRACING", "1") != "0")
+if os.environ.get("PPT_TRACEMALLOC") == "1" and not tracemalloc.is_tracing():
+    tracemalloc.start()
+
+span = tracer.span
+traced = tracer.traced
+
+def annotate(**attrs):
+    # Adds attributes to the innermost active span, if there is one
+    current = _current_span.get()
+    if current is not None:
+        current.attrs.update(attrs)
@@ -1,10 +1,100 @@
 # agents/ui_handler.py
+import io
+import json
 import streamlit as st
 from .data_loader import DataLoaderAgent
 from .content_generator import ContentGeneratorAgent
 from .slide_builder import SlideBuilderAgent
 from .plot_generator import PlotGeneratorAgent
 from .report_assembler import ReportAssemblerAgent
+from .response_cache import ResponseCache
+from .dataset_cache import DatasetCache
+from .chart_cache import ChartCache
+from .office_pool import OfficeConversionPool
+from .job_engine import JobEngine, STAGES
+from .tracing import tracer, span
+
+# Built once per server process and shared by every session: the caches, the stateless agents and office workers
+@st.cache_resource
+def _shared_resources():
+    return {
+        "dataset_cache": DatasetCache(),
+        "content_gen": ContentGeneratorAgent(cache=ResponseCache()),
+        "plot_gen": PlotGeneratorAgent(cache=ChartCache()),
+        "conversion_pool": OfficeConversionPool(size=2)
+    }
+
+# Agents holding one user's data and decks live in that user's session and survive reruns
+def _session_agents(shared):
+    if "data_loader" not in st.session_state:
+        st.session_state['data_loader'] = DataLoaderAgent(dataset_cache=shared["dataset_cache"])
+        st.session_state['report_assembler'] = ReportAssemblerAgent(conversion_pool=shared["conversion_pool"])
+        st.session_state['reports'] = {}  # Report inputs -> built deck and slide titles
+        st.session_state['job_engine'] = JobEngine()  # Background generation and export; jobs outlive reruns
+    return st.session_state['data_loader'], st.session_state['report_assembler']
+
+_MAX_SESSION_REPORTS = 4
+_STAGE_LABELS = {"load": "Loading data and statistics", "llm": "LLM calls", "charts": "Charts", "assembly": "Assembling slides", "export": "Exporting"}
+_MIME_TYPES = {"odp": "application/vnd.oasis.opendocument.presentation", "pdf": "application/pdf", "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document", "pptx": "application/vnd.openxmlformats-officedocument.presentationml.presentation", "zip": "application/zip"}
+
+def _timings(root):
+    # Per-span breakdown and Chrome trace of one job; nothing when tracing is turned off
+    if root is None:
+        return None
+    return {"breakdown": tracer.breakdown(root), "trace": json.dumps(tracer.chrome_trace(root))}
+
+def _generate_deck(job, shared, csv_bytes, col, plot_type, min_slides, user_prompt, theme, font_style):
+    # Runs on a job thread with its own agents, so reruns of the script never touch its state
+    data_loader = DataLoaderAgent(dataset_cache=shared["dataset_cache"])
+    report_assembler = ReportAssemblerAgent(conversion_pool=shared["conversion_pool"])
+    with span("generate_deck", col=col, plot_type=plot_type) as root:
+        success, slide_titles = report_assembler.assemble_report(
+            io.BytesIO(csv_bytes), col, plot_type, min_slides, user_prompt, theme, font_style,
+            data_loader, shared["content_gen"], SlideBuilderAgent(stamping=True), shared["plot_gen"], on_progress=job.update
+        )
+    if not success:
+        raise RuntimeError(slide_titles)
+    return {"deck": report_assembler.deck, "slide_titles": slide_titles, "timings": _timings(root)}
+
+def _export_deck(job, report_assembler, deck, export_format):
+    job.update("export", 0, 1)
+    with span("export_deck", format=export_format) as root:
+        if export_format == "zip":
+            # PPTX, PDF and DOCX of the same deck in one archive, converted concurrently
+            success, result = report_assembler.export_all(["pptx", "pdf", "docx"], as_zip=True, deck=deck)
+        else:
+            success, result = report_assembler.finalize_report(export_format, deck=deck)
+    if not success:
+        raise RuntimeError(result)
+    job.update("export", 1, 1)
+    return {"data": result, "timings": _timings(root)}
+
+def _show_timings(timings, label, key):
+    # Where the time went, slowest span first, plus the full trace for chrome://tracing or Perfetto
+    if not timings:
+        return
+    with st.expander(label):
+        st.dataframe(timings["breakdown"])
+        st.download_button("Download Chrome Trace", data=timings["trace"], file_name=f"{key}_trace.json",
+                           mime="application/json", key=f"trace_{key}")
+
+@st.fragment(run_every=1.0)
+def _show_job(job, cancellable=True):
+    # Polls a running job once a second without rerunning the whole script. Exports run as one conversion
+    # call that cannot be interrupted, so they are shown without a Cancel button.
+    snapshot = job.snapshot()
+    for stage in STAGES:
+        if stage in snapshot["stages"]:
+            done, total = snapshot["stages"][stage]
+            st.progress(done / total if total else 1.0, text=f"{_STAGE_LABELS[stage]}: {done}/{total}")
+    if not job.active:
+        st.rerun()
+    if not cancellable:
+        return
+    if job.cancel_requested:
+        st.info("Cancelling...")
+    elif st.button("Cancel", key=f"cancel_{job.id}"):
+        job.cancel()
 
 class UIHandlerAgent:
     def run(self):
@@ -18,12 +108,10 @@ class UIHandlerAgent:
         uploaded_file = st.file_uploader("Choose a CSV file", type="csv")
         
         if uploaded_file:
-            data_loader = DataLoaderAgent()
-            content_gen = ContentGeneratorAgent()
-            slide_builder = SlideBuilderAgent()
-            plot_gen = PlotGeneratorAgent()
-            report_assembler = ReportAssemblerAgent()
+            shared = _shared_resources()
+            data_loader, report_assembler = _session_agents(shared)
             
+            # Same upload as the last rerun: returns the stored result without parsing again
             success, message = data_loader.load_data(uploaded_file)
             if not success:
                 st.error(message)
@@ -37,39 +125,72 @@ class UIHandlerAgent:
             user_prompt = st.text_area("Optional: Customize PPT (e.g., 'add summary slide')", 
                                        "Default analysis of one column vs others", height=100)
             
+            reports = st.session_state['reports']
+            job_engine = st.session_state['job_engine']
+            report_key = (data_loader.digest, col, plot_type, int(min_slides), user_prompt, theme, font_style)
             if st.button("Generate Draft Report"):
-                with st.spinner("Generating draft report with LLaMA..."):
-                    success, slide_titles = report_assembler.assemble_report(
-                        uploaded_file, col, plot_type, min_slides, user_prompt,
-                        theme, font_style, data_loader, content_gen, slide_builder, plot_gen
-                    )
-                    if success:
-                        st.success("Draft report generated!")
-                        st.session_state['slide_titles'] = slide_titles
-                        st.session_state['draft_generated'] = True
-                    else:
-                        st.error(f"Error: {slide_titles}")
-                        return
+                if report_key in reports:
+                    st.success("Draft report generated!")  # Built earlier this session from the same inputs
+                else:
+                    job_engine.submit(_generate_deck, shared, uploaded_file.getvalue(), col, plot_type, int(min_slides),
+                                      user_prompt, theme, font_style, key=report_key)
+            
+            job = job_engine.find(report_key)
+            if job is not None and report_key not in reports:
+                if job.active:
+                    st.write("Generating draft report with LLaMA...")
+                    _show_job(job)
+                    return
+                if job.status == "done":
+                    st.success("Draft report generated!")
+                    reports[report_key] = job.result
+                    while len(reports) > _MAX_SESSION_REPORTS:
+                        reports.pop(next(iter(reports)))
+                elif job.status == "failed":
+                    st.error(f"Error: {job.error}")
+                    return
+                elif job.status == "cancelled":
+                    st.warning("Draft generation was cancelled.")
             
-            if st.session_state.get('draft_generated', False):
+            if report_key in reports:
                 st.subheader("Edit Slides")
+                deck = reports[report_key]["deck"]
+                widget_prefix = f"edit_{abs(hash(report_key))}"
+                export_state = st.session_state.get('export_job')
+                export_job = job_engine.get(export_state[0]) if export_state else None
+                # An export job reads this deck on another thread, so it must not be edited meanwhile
+                exporting = export_job is not None and export_job.active and export_state[2] == report_key
+                _show_timings(reports[report_key].get("timings"), "Generation timing breakdown", widget_prefix)
                 edited_slides = {}
-                for title in st.session_state['slide_titles']:
-                    edited_content = st.text_area(f"Edit {title}", value="\n".join([f"• Point {i+1}" for i in range(5)]), height=150)
-                    edited_slides[title] = edited_content.split('\n')
+                for i, spec in enumerate(deck.slides):
+                    if spec["content"] and spec["layout"] == "text" and spec["image"] is None:
+                        edited_content = st.text_area(f"Edit {spec['title']}", value="\n".join(spec["content"]), height=150, key=f"{widget_prefix}_{i}")
+                        edited_slides[i] = edited_content.split('\n')
+                if st.button("Apply Edits", disabled=exporting) and not exporting:
+                    # Only the slides whose text changed are re-rendered
+                    changed = sum(deck.update_slide(i, content=content) for i, content in edited_slides.items())
+                    st.success(f"Updated {changed} slide(s).")
                 
-                export_format = st.selectbox("Select Export Format", ["odp", "pdf", "docx"])
+                export_format = st.selectbox("Select Export Format", ["odp", "pdf", "docx", "pptx", "zip"])
                 if st.button("Finalize and Export Report"):
-                    with st.spinner(f"Exporting report as {export_format}..."):
-                        success, result = report_assembler.finalize_report(export_format)
-                        if success:
-                            st.success("Report exported successfully!")
-                            mime_types = {"odp": "application/vnd.oasis.opendocument.presentation", "pdf": "application/pdf", "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document"}
-                            st.download_button(
-                                label=f"Download {export_format.upper()} Report",
-                                data=result,
-                                file_name=f"one_column_eda_report.{export_format}",
-                                mime=mime_types[export_format]
-                            )
-                        else:
-                            st.error(f"Error: {result}")
\ No newline at end of file
+                    export_job = job_engine.submit(_export_deck, report_assembler, deck, export_format)
+                    st.session_state['export_job'] = (export_job.id, export_format, report_key)
+                    st.rerun()  # Redraw with Apply Edits disabled while the export reads the deck
+                if 'export_job' in st.session_state:
+                    export_job_id, export_format, _ = st.session_state['export_job']
+                    export_job = job_engine.get(export_job_id)
+                    if export_job is not None and export_job.active:
+                        _show_job(export_job, cancellable=False)
+                    elif export_job is not None and export_job.status == "done":
+                        st.success("Report exported successfully!")
+                        st.download_button(
+                            label=f"Download {export_format.upper()} Report",
+                            data=export_job.result["data"],
+                            file_name=f"one_column_eda_report.{export_format}",
+                            mime=_MIME_TYPES[export_format]
+                        )
+                        _show_timings(export_job.result["timings"], "Export timing breakdown", f"export_{export_job_id}")
+                    elif export_job is not None and export_job.status == "failed":
+                        st.error(f"Error: {export_job.error}")
+                    elif export_job is not None and export_job.status == "cancelled":
+                        st.warning("Export was cancelled.")
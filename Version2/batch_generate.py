@@ -0,0 +1,19 @@
+# batch_generate.py
+import argparse
+import json
+from agents import run_batch
+
+# Run with: python batch_generate.py manifest.csv --out-dir decks
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate one deck per manifest row without the Streamlit UI.")
+    parser.add_argument("manifest", help="CSV, JSON or JSONL manifest with csv, column and optional plot_type, prompt, theme, font, format, min_slides, name")
+    parser.add_argument("--out-dir", default="decks", help="Where decks, per-job records and summary.json are written")
+    parser.add_argument("--workers", type=int, default=None, help="Parallel jobs (default: one per CPU)")
+    parser.add_argument("--no-resume", action="store_true", help="Rebuild decks that a previous run already finished")
+    args = parser.parse_args()
+    summary = run_batch(args.manifest, args.out_dir, workers=args.workers, resume=not args.no_resume)
+    print(json.dumps({key: value for key, value in summary.items() if key != "jobs"}, indent=2))
+    for job in summary["jobs"]:
+        if job["status"] == "failed":
+            print(f"FAILED {job['name']}: {job['error']}")
+    raise SystemExit(1 if summary["failed"] else 0)
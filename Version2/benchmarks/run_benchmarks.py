@@ -0,0 +1,230 @@
+# benchmarks/run_benchmarks.py
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import resource
+import shutil
+import sys
+import threading
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+GRIDS = {
+    "quick": {"rows": [1_000, 10_000, 100_000], "cols": [5, 20], "numeric": [1.0, 0.5]},
+    "full": {"rows": [1_000, 10_000, 100_000, 1_000_000, 10_000_000], "cols": [5, 20, 100, 1000], "numeric": [1.0, 0.5, 0.0]}
+}
+DATA_DIR = os.path.join(".cache", "benchmarks")
+
+class PeakRSS:
+    # Samples /proc/self/statm while a stage runs; elsewhere falls back to the process-wide ru_maxrss
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.page_size = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+        self.available = os.path.exists("/proc/self/statm")
+
+    def _rss(self):
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * self.page_size
+
+    def __enter__(self):
+        self.peak = self._rss() if self.available else 0
+        self._stop = threading.Event()
+        if self.available:
+            self._thread = threading.Thread(target=self._sample, daemon=True)
+            self._thread.start()
+        return self
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, self._rss())
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        if self.available:
+            self._thread.join()
+            self.peak = max(self.peak, self._rss())
+        else:
+            scale = 1 if sys.platform == "darwin" else 1024
+            self.peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+        return False
+
+
+def measure(fn):
+    # Wall time, CPU time of this process and of finished child processes (chart workers), and peak RSS
+    self_cpu = time.process_time()
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    started = time.perf_counter()
+    with PeakRSS() as rss:
+        result = fn()
+    wall = time.perf_counter() - started
+    children_after = resource.getrusage(resource.RUSAGE_CHILDREN)
+    cpu = time.process_time() - self_cpu + (children_after.ru_utime - children.ru_utime) + (children_after.ru_stime - children.ru_stime)
+    return result, {"wall_s": round(wall, 4), "cpu_s": round(cpu, 4), "peak_rss_mb": round(rss.peak / 2**20, 1)}
+
+def synthetic_csv(rows, cols, numeric, seed=0, chunk_rows=200_000):
+    # Written once per grid point and reused; chunked so 10M-row files never sit in memory
+    path = os.path.join(DATA_DIR, f"r{rows}_c{cols}_n{int(numeric * 100)}_s{seed}.csv")
+    if os.path.exists(path):
+        return path
+    os.makedirs(DATA_DIR, exist_ok=True)
+    num_numeric = round(cols * numeric)
+    rng = np.random.default_rng(seed)
+    categories = np.array([f"cat_{i}" for i in range(20)])
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", newline="") as f:
+        for start in range(0, rows, chunk_rows):
+            n = min(chunk_rows, rows - start)
+            data = {}
+            for c in range(cols):
+                if c < num_numeric:
+                    data[f"num_{c}"] = rng.normal(loc=c, scale=1 + c % 5, size=n).round(4)
+                else:
+                    data[f"cat_{c}"] = categories[rng.integers(0, 5 + c % 15, size=n)]
+            pd.DataFrame(data).to_csv(f, index=False, header=start == 0)
+    os.replace(tmp_path, path)
+    return path
+
+def run_case(rows, cols, numeric, args, llm):
+    from agents import DataLoaderAgent, ContentGeneratorAgent, SlideBuilderAgent, PlotGeneratorAgent, ReportAssemblerAgent
+    from agents.office_pool import OfficeConversionPool
+    path = synthetic_csv(rows, cols, numeric, args.seed)
+    results = {}
+
+    def load():
+        loader = DataLoaderAgent()
+        with open(path, "rb") as f:
+            success, message = loader.load_data(f)
+        if not success:
+            raise RuntimeError(message)
+        return loader
+    loader, results["load"] = measure(load)
+
+    target = loader.df.columns[0]
+    others = [c for c in loader.df.columns if c != target][:args.max_charts]
+    plot_gen = PlotGeneratorAgent(max_workers=args.chart_workers)
+    charts, results["plots"] = measure(lambda: plot_gen.generate_plots(loader.df, target, others, args.plot_type))
+
+    def slides():
+        builder = SlideBuilderAgent(stamping=True)
+        for i in range(args.slides):
+            if charts and i % 3 == 0:
+                builder.add_slide(f"Chart {i}", image=charts[i % len(charts)][0])
+            else:
+                builder.add_slide(f"Slide {i}", [f"Bullet {j} on slide {i}" for j in range(6)])
+        return builder
+    _, results["slides"] = measure(slides)
+
+    assembler = ReportAssemblerAgent(conversion_pool=OfficeConversionPool(size=1))
+    def assemble():
+        llm.calls = 0
+        with open(path, "rb") as f:
+            success, message = assembler.assemble_report(
+                f, target, args.plot_type, args.min_slides, "Default analysis of one column vs others", "light", "Arial",
+                DataLoaderAgent(), ContentGeneratorAgent(backend=llm, rng=random.Random(args.seed)), SlideBuilderAgent(stamping=True), PlotGeneratorAgent(max_workers=args.chart_workers)
+            )
+        if not success:
+            raise RuntimeError(message)
+    _, results["assemble"] = measure(assemble)
+    results["assemble"]["llm_calls"] = llm.calls
+
+    for fmt in args.formats:
+        if fmt == "odp" and not (shutil.which("soffice") or shutil.which("libreoffice")):
+            results[f"export_{fmt}"] = {"skipped": "LibreOffice not installed"}
+            continue
+        data, results[f"export_{fmt}"] = measure(lambda: assembler.finalize_report(fmt))
+        success, payload = data
+        if not success:
+            results[f"export_{fmt}"] = {"error": payload}
+        else:
+            results[f"export_{fmt}"]["bytes"] = len(payload)
+    assembler.conversion_pool.close()
+    return results
+
+def compare(baseline, current, threshold, min_seconds):
+    # Prints per-stage ratios against the baseline and returns the stages slower than threshold;
+    # stages shorter than min_seconds in the baseline are shown but too noisy to count
+    previous = {(r["case"], stage): metrics for r in baseline["results"] for stage, metrics in r["stages"].items()}
+    regressions = []
+    print(f"{'case':<28}{'stage':<14}{'base s':>10}{'now s':>10}{'ratio':>8}{'base MB':>10}{'now MB':>10}")
+    for r in current["results"]:
+        for stage, metrics in r["stages"].items():
+            old = previous.get((r["case"], stage))
+            if not old or "wall_s" not in old or "wall_s" not in metrics:
+                continue
+            ratio = metrics["wall_s"] / old["wall_s"] if old["wall_s"] else float("inf")
+            flag = " !" if ratio > 1 + threshold and old["wall_s"] >= min_seconds else ""
+            print(f"{r['case']:<28}{stage:<14}{old['wall_s']:>10.3f}{metrics['wall_s']:>10.3f}{ratio:>8.2f}"
+                  f"{old['peak_rss_mb']:>10.1f}{metrics['peak_rss_mb']:>10.1f}{flag}")
+            if flag:
+                regressions.append((r["case"], stage, ratio))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end benchmarks for the Version2 pipeline with a stub LLM.")
+    parser.add_argument("--grid", choices=sorted(GRIDS), default="quick")
+    parser.add_argument("--rows", type=int, nargs="+", help="Override the grid's row counts")
+    parser.add_argument("--cols", type=int, nargs="+", help="Override the grid's column counts")
+    parser.add_argument("--numeric", type=float, nargs="+", help="Override the grid's numeric column fractions")
+    parser.add_argument("--formats", nargs="+", default=["pptx", "pdf", "docx", "odp"])
+    parser.add_argument("--plot-type", default="Scatter")
+    parser.add_argument("--max-charts", type=int, default=10, help="Charts rendered in the plots stage")
+    parser.add_argument("--chart-workers", type=int, default=None)
+    parser.add_argument("--slides", type=int, default=60, help="Slides built in the slides stage")
+    parser.add_argument("--min-slides", type=int, default=8)
+    parser.add_argument("--llm-backend", choices=["fake", "ollama", "openai"], default="fake",
+                        help="fake runs in-process; ollama or openai talk to --llm-url, e.g. stub_ollama_server.py")
+    parser.add_argument("--llm-url", help="Server for the ollama or openai backend")
+    parser.add_argument("--llm-model", default="llama3.2")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Seconds per fake LLM call")
+    parser.add_argument("--llm-tokens-per-second", type=float, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--compare", help="Baseline JSON to compare this run against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Slowdown ratio counted as a regression")
+    parser.add_argument("--min-seconds", type=float, default=0.05, help="Baseline stages shorter than this are not flagged")
+    args = parser.parse_args()
+
+    from agents.llm_backends import FakeBackend, OllamaBackend, OpenAICompatibleBackend
+    if args.llm_backend == "ollama":
+        llm = OllamaBackend(args.llm_model, host=args.llm_url)
+    elif args.llm_backend == "openai":
+        llm = OpenAICompatibleBackend(args.llm_model, base_url=args.llm_url) if args.llm_url else OpenAICompatibleBackend(args.llm_model)
+    else:
+        llm = FakeBackend(latency=args.llm_latency, tokens_per_second=args.llm_tokens_per_second)
+
+    grid = dict(GRIDS[args.grid])
+    for name in ("rows", "cols", "numeric"):
+        if getattr(args, name):
+            grid[name] = getattr(args, name)
+    report = {
+        "meta": {"timestamp": time.time(), "python": platform.python_version(), "platform": platform.platform(),
+                 "cpu_count": os.cpu_count(), "pandas": pd.__version__, "numpy": np.__version__,
+                 "settings": {key: value for key, value in vars(args).items() if key not in ("output", "compare")}},
+        "results": []
+    }
+    for rows, cols, numeric in itertools.product(grid["rows"], grid["cols"], grid["numeric"]):
+        case = f"r{rows}_c{cols}_n{int(numeric * 100)}"
+        print(f"Running {case}...", flush=True)
+        try:
+            stages = run_case(rows, cols, numeric, args, llm)
+        except Exception as e:
+            stages = {"error": {"error": f"{type(e).__name__}: {e}"}}
+        report["results"].append({"case": case, "rows": rows, "cols": cols, "numeric": numeric, "stages": stages})
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)  # Rewritten after every case so partial runs keep their results
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), report, args.threshold, args.min_seconds)
+        if regressions:
+            print(f"{len(regressions)} stage(s) slower than the baseline by more than {args.threshold:.0%}")
+            raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
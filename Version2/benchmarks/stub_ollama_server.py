@@ -0,0 +1,189 @@
+# benchmarks/stub_ollama_server.py
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from agents.llm_backends import FakeBackend
+
+# Deterministic local server speaking the parts of the Ollama HTTP API the app uses (/api/generate, /api/tags,
+# /api/version) plus the OpenAI-compatible /v1/chat/completions. Answers come from FakeBackend, so they depend
+# only on the prompt. max_parallel requests generate at once and the rest queue, like OLLAMA_NUM_PARALLEL;
+# GET /stats reports request, failure and concurrency counters.
+class StubState:
+    def __init__(self, args):
+        self.backend = FakeBackend(model=args.model, points=args.points)
+        self.latency = args.latency
+        self.jitter = args.jitter
+        self.tokens_per_second = args.tokens_per_second
+        self.failure_rate = args.failure_rate
+        self.failure_status = args.failure_status
+        self.slots = threading.BoundedSemaphore(args.max_parallel)
+        self.random = random.Random(args.seed)
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "failures": 0, "disconnects": 0, "tokens": 0, "in_flight": 0, "peak_in_flight": 0, "queued": 0, "peak_queued": 0}
+
+    def count(self, name, delta=1):
+        with self.lock:
+            self.stats[name] += delta
+            peak = f"peak_{name}"
+            if peak in self.stats:
+                self.stats[peak] = max(self.stats[peak], self.stats[name])
+
+    def draw(self):
+        # Failure decision and latency for one request, from the seeded generator
+        with self.lock:
+            fail = self.random.random() < self.failure_rate
+            delay = max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+        return fail, delay
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    state = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path == "/api/tags":
+            self._json({"models": [{"name": self.state.backend.model, "model": self.state.backend.model, "size": 0}]})
+        elif self.path == "/api/version":
+            self._json({"version": "0.0.0-stub"})
+        elif self.path == "/stats":
+            with self.state.lock:
+                self._json(dict(self.state.stats))
+        else:
+            self._json({"error": "not found"}, 404)
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        if self.path == "/api/generate":
+            prompt, stream = body.get("prompt", ""), body.get("stream", True)  # Ollama streams unless told otherwise
+        elif self.path == "/v1/chat/completions":
+            prompt = "\n".join(message.get("content", "") for message in body.get("messages", []))
+            stream = body.get("stream", False)
+        else:
+            self._json({"error": "not found"}, 404)
+            return
+        state = self.state
+        state.count("requests")
+        state.count("queued")
+        with state.slots:
+            state.count("queued", -1)
+            state.count("in_flight")
+            try:
+                self._generate(body, prompt, stream)
+            except (BrokenPipeError, ConnectionResetError):
+                state.count("disconnects")  # The client stopped reading, e.g. an early-stopped stream
+                self.close_connection = True
+            finally:
+                state.count("in_flight", -1)
+
+    def _generate(self, body, prompt, stream):
+        fail, delay = self.state.draw()
+        time.sleep(delay)
+        if fail:
+            self.state.count("failures")
+            self._json({"error": "injected failure"}, self.state.failure_status)
+            return
+        options = body.get("options") or {}
+        if "max_tokens" in body:
+            options = {**options, "num_predict": body["max_tokens"]}
+        result = self.state.backend.generate(prompt, options=options)
+        tokens = result["response"].split(" ")
+        tokens = [token if i == 0 else " " + token for i, token in enumerate(tokens)]
+        delay = 1 / self.state.tokens_per_second if self.state.tokens_per_second else 0
+        counts = {"prompt_eval_count": result["prompt_eval_count"], "eval_count": result["eval_count"]}
+        openai = self.path.startswith("/v1/")
+        if not stream:
+            time.sleep(delay * len(tokens))
+            self.state.count("tokens", len(tokens))
+            self._json(self._openai_result(result["response"], counts) if openai else self._ollama_chunk(result["response"], True, counts))
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream" if openai else "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for token in tokens:
+            time.sleep(delay)
+            self._chunk(self._openai_delta(token) if openai else self._ollama_chunk(token, False), openai)
+            self.state.count("tokens")
+        if openai:
+            self._chunk({"choices": [], "usage": {"prompt_tokens": counts["prompt_eval_count"], "completion_tokens": counts["eval_count"]}}, True)
+            self._write_chunk(b"data: [DONE]\n\n")
+        else:
+            self._chunk(self._ollama_chunk("", True, counts), False)
+        self._write_chunk(b"")
+
+    def _ollama_chunk(self, text, done, counts=None):
+        chunk = {"model": self.state.backend.model, "created_at": datetime.now(timezone.utc).isoformat(), "response": text, "done": done}
+        if done:
+            chunk.update({"done_reason": "stop", **(counts or {})})
+        return chunk
+
+    def _openai_delta(self, text):
+        return {"object": "chat.completion.chunk", "model": self.state.backend.model, "choices": [{"index": 0, "delta": {"content": text}}]}
+
+    def _openai_result(self, text, counts):
+        return {"object": "chat.completion", "model": self.state.backend.model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": counts["prompt_eval_count"], "completion_tokens": counts["eval_count"]}}
+
+    def _chunk(self, data, sse):
+        line = json.dumps(data).encode("utf-8")
+        self._write_chunk(b"data: " + line + b"\n\n" if sse else line + b"\n")
+
+    def _write_chunk(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def _json(self, data, status=200):
+        payload = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+def make_server(args):
+    handler = type("Handler", (StubHandler,), {"state": StubState(args)})
+    server = ThreadingHTTPServer((args.host, args.port), handler)
+    server.daemon_threads = True
+    return server
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Deterministic stand-in for an Ollama server, for load tests and CI.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435, help="0 picks a free port")
+    parser.add_argument("--model", default="llama3.2")
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds before the first token")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Uniform +/- seconds added to --latency")
+    parser.add_argument("--tokens-per-second", type=float, default=50.0, help="0 sends every token at once")
+    parser.add_argument("--points", type=int, default=7, help="Lines in every answer")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Share of requests answered with an error")
+    parser.add_argument("--failure-status", type=int, default=500)
+    parser.add_argument("--max-parallel", type=int, default=4, help="Requests generating at once; the rest wait")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args(argv)
+
+def main():
+    server = make_server(parse_args())
+    host, port = server.server_address[:2]
+    print(f"Stub Ollama server on http://{host}:{port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+import io
+import numpy as np
+import pandas as pd
+from agents import DataLoaderAgent
+
+def _csv(df):
+    return io.BytesIO(df.to_csv(index=False).encode("utf-8"))
+
+def test_chunked_matches_full_when_chunks_mix_int_and_float():
+    # Chunks without missing values parse as int64, chunks with them as float64
+    rng = np.random.default_rng(0)
+    ints = pd.Series(rng.integers(0, 100, size=10_000), dtype="Int64")
+    ints[5000::7] = pd.NA
+    df = pd.DataFrame({"ints": ints, "other": rng.normal(size=10_000)})
+    full = DataLoaderAgent()
+    chunked = DataLoaderAgent(chunksize=1000)
+    assert full.load_data(_csv(df))[0]
+    assert chunked.load_data(_csv(df))[0]
+    assert full.stats["ints"]["unique"] == "100"
+    assert dict(chunked.stats["ints"]) == dict(full.stats["ints"])
+    assert np.isclose(chunked.stats.correlation("ints", "other"), full.stats.correlation("ints", "other"))